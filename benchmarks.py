@@ -0,0 +1,198 @@
+import io
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+import vm
+import x_lexer
+import x_parser
+from x_scanner import Scanner
+from classes.optimizer import PASSES
+from classes.context import CompilationContext
+from classes import objectfile
+from classes.engine import Engine
+from classes.blocks import BlockEngine
+from classes.memory import MemoryManager, FlatMemoryManager
+
+# Benchmark programs
+
+recursion_program = """
+    program bench;
+
+    var depth : int;
+
+    void down(n : int) [
+        var x : int;
+        {
+            x = n - 1;
+            if (n > 0) {
+                down(x);
+            };
+        }
+    ];
+
+    main {
+        down(depth);
+    }
+    end
+"""
+
+
+def generate_source(functions):
+    """
+    Generate a large program exercising every token: globals, then many functions with loops, conditions, calls and prints.
+    """
+    lines = ['program generated;', '', 'var i, n : int;', '    x, y : float;', '']
+    for index in range(functions):
+        lines += [
+            f'void f{index}(a : int, b : float) [',
+            '    var k : int;',
+            '    z : float;',
+            '    {',
+            '        # Count down and mix the arguments',
+            '        k = a * 2 + 10;',
+            '        while (k > 0) {',
+            '            z = (b - 1.5) / 2.25e+1 + k;',
+            '            if (k != a) {',
+            '                print("step", k, z);',
+            '            } else {',
+            "                print('equal');",
+            '            };',
+            '            k = k - 1;',
+            '        };',
+            '    }',
+            '];',
+            '',
+        ]
+    lines += ['main {', '    i = 0;', '    n = 3;']
+    lines += [f'    f{index}(i + {index}, x * 0.5);' for index in range(functions)]
+    lines += ['    do {', '        i = i + 1;', '    } while (i <= n);', '}', 'end', '']
+    return '\n'.join(lines)
+
+
+def compile_program(code, passes=(), context=None):
+    counter_table, constant_table, quadruples = x_parser.parse(code, passes, context=context)
+    return objectfile.loads(objectfile.dumps(counter_table, constant_table, quadruples.quadruples))
+
+
+def run(program, engine, initial=None, memory='segments'):
+    memory_manager = FlatMemoryManager() if memory == 'flat' else MemoryManager()
+    memory_manager.load(program)
+    for address, value in (initial or {}).items():
+        memory_manager.assign(address, value)
+
+    start = time.perf_counter()
+    if engine == 'legacy':
+        vm.memory_manager = memory_manager
+        vm.execute(program.quadruples)
+    elif engine == 'blocks':
+        BlockEngine(memory_manager, program.quadruples).run()
+    else:
+        Engine(memory_manager, program.quadruples).run()
+    return time.perf_counter() - start
+
+
+def bench_recursion(depths, engines, passes=(), memory='segments'):
+    context = CompilationContext()
+    program = compile_program(recursion_program, passes, context)
+    depth_address = context.function_directory.lookup('bench').child.lookup('depth').address
+
+    print(f'{"depth":>8} ' + ' '.join(f'{engine + " (s)":>14} {"us/call":>8}' for engine in engines))
+    for depth in depths:
+        row = f'{depth:>8} '
+        for engine in engines:
+            elapsed = run(program, engine, {depth_address: depth}, memory)
+            row += f'{elapsed:>14.4f} {elapsed / (depth + 1) * 1e6:>8.2f} '
+        print(row)
+
+
+def bench_startup(runs):
+    def measure(code):
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], check=True)
+            times.append(time.perf_counter() - start)
+        return statistics.median(times)
+
+    def generated():
+        # Fresh tables directory per run, so the tables are generated every time
+        times = []
+        for _ in range(runs):
+            with tempfile.TemporaryDirectory() as directory:
+                code = f'import classes.tables as tables; tables.TABLES_DIR = {directory!r}; import x_parser'
+                start = time.perf_counter()
+                subprocess.run([sys.executable, '-c', code], check=True)
+                times.append(time.perf_counter() - start)
+        return statistics.median(times)
+
+    with open('tests/factorial.duck', 'r') as file:
+        source = file.read()
+
+    rows = [
+        ('interpreter', measure('pass')),
+        ('import, cached tables', measure('import x_parser')),
+        ('import, generated tables', generated()),
+        ('compile factorial.duck', measure(f'import x_parser; x_parser.parse({source!r})')),
+    ]
+
+    print(f'{"startup":<26} {"median (ms)":>12}')
+    for name, elapsed in rows:
+        print(f'{name:<26} {elapsed * 1000:>12.1f}')
+
+
+def bench_lexer(sizes, runs):
+    def ply_tokens(source):
+        lexer = x_lexer.lexer.clone()
+        lexer.input(source)
+        return sum(1 for _ in iter(lexer.token, None))
+
+    def scanner_tokens(source):
+        scanner = Scanner(io.StringIO(source))
+        return sum(1 for _ in iter(scanner.token, None))
+
+    print(f'{"functions":>10} {"size (KB)":>10} {"tokens":>9} {"ply (tok/s)":>12} {"scanner (tok/s)":>16} {"speedup":>8}')
+    for size in sizes:
+        source = generate_source(size)
+        rates = []
+        for count in (ply_tokens, scanner_tokens):
+            times = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                tokens = count(source)
+                times.append(time.perf_counter() - start)
+            rates.append(tokens / min(times))
+        print(f'{size:>10} {len(source) / 1024:>10.0f} {tokens:>9} {rates[0]:>12.0f} {rates[1]:>16.0f} {rates[1] / rates[0]:>7.2f}x')
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser(description="Run a benchmark.")
+    argparser.add_argument("--recursion", action="store_true", help="Run recursion depth against time benchmark.")
+    argparser.add_argument("--startup", action="store_true", help="Run compiler startup time benchmark, in fresh interpreters.")
+    argparser.add_argument("--runs", type=int, default=10, help="The number of fresh interpreters per startup measurement.")
+    argparser.add_argument("--lexer", action="store_true", help="Run lexer throughput benchmark, PLY against the streaming scanner.")
+    argparser.add_argument("--functions", type=int, nargs="+", default=[100, 1000, 10000], help="The number of functions of the generated sources.")
+    argparser.add_argument("--depths", type=int, nargs="+", default=[1000, 2000, 4000, 8000, 16000], help="The recursion depths.")
+    argparser.add_argument("--engines", nargs="+", choices=["table", "blocks", "legacy"], help="The execution engines, all of them by default (table only with --memory flat).")
+    argparser.add_argument("--passes", nargs="+", choices=list(PASSES), default=[], help="The optimization passes to compile with (tail_calls keeps the call stack flat).")
+    argparser.add_argument("--memory", choices=["segments", "flat"], default="segments", help="The memory model (flat runs with the table engine only).")
+    args = argparser.parse_args()
+
+    if args.memory == 'flat':
+        if args.engines and args.engines != ['table']:
+            argparser.error('--memory flat runs with the table engine only')
+        args.engines = ['table']
+    elif not args.engines:
+        args.engines = ['table', 'blocks', 'legacy']
+
+    if args.recursion:
+        bench_recursion(args.depths, args.engines, args.passes, args.memory)
+
+    if args.startup:
+        bench_startup(args.runs)
+
+    if args.lexer:
+        bench_lexer(args.functions, args.runs)
@@ -0,0 +1,332 @@
+"""
+Batch execution engine module.
+
+This module contains an execution engine that runs one compiled program
+over many initial states at once. Every memory slot holds a NumPy vector
+with one lane per run, so arithmetic quadruples run vectorized over all the
+lanes that reach them.
+
+Lanes keep their own instruction pointer. At every step the engine runs
+the quadruple with the lowest instruction pointer for the lanes stopped at
+it (a lane mask), so lanes that take different branches run apart and meet
+again where the branches join. Function calls keep a return address, a
+base pointer and a frame per lane: locals live in an arena where every lane
+has its own frames, like FlatMemoryManager.
+
+NumPy is only needed by this engine.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from classes.operators import OPERATORS_NUMERIC, OPERATOR_FUNCTIONS, BRANCH_OPERATORS
+
+# Array types of the memory segments
+DTYPES = {'int': 'int64', 'float': 'float64', 'bool': 'bool'}
+
+# Initial capacity of the local arena (frames) and of the call stack (depth)
+ARENA_SIZE = 64
+STACK_SIZE = 16
+
+
+class BatchEngine:
+    """
+    This class represents the batch execution engine.
+
+    Integers are limited to 64 bits and variables that are read before
+    being assigned hold 0 instead of None, every call starts with a zeroed
+    frame. Where the other engines raise ZeroDivisionError, the lanes that
+    divide by zero stop with the error as their last output line and the
+    other lanes go on.
+
+    Attributes:
+    - memory_manager (MemoryManager): The runtime memory, already described, it provides the constants.
+    - lanes (int): The number of runs.
+    - memory (dict): The global and temporal segments by type, arrays of shape (size, lanes).
+    - arena (dict): The local segments by type, arrays of shape (slots, lanes).
+    - frame_sizes (dict): The frame size of every function by address.
+    - ip (ndarray): The instruction pointer of every lane.
+    - base_pointer (ndarray): The index of the current frame of every lane in the arena.
+    - stack_pointer (ndarray): The index of the first free arena slot of every lane.
+    - staged (ndarray): The index of the staged frame of every lane.
+    - depth (ndarray): The number of active function calls of every lane.
+    - returns (ndarray): The return addresses of every lane, shape (depth, lanes).
+    - saved_bases (ndarray): The base pointers of the callers of every lane, shape (depth, lanes).
+    - outputs (list): The printed lines of every lane.
+    - end (int): The number of quadruples, the instruction pointer of lanes that stopped.
+    - program (list): The decoded handlers, indexed by quadruple.
+    """
+
+    def __init__(self, memory_manager, quadruples, lanes, initial=None):
+        if np is None:
+            raise ImportError('The batch engine requires NumPy (pip install numpy)')
+
+        self.memory_manager = memory_manager
+        self.lanes = lanes
+        descriptor = memory_manager.descriptor
+
+        self.memory = {
+            type: np.zeros((size, lanes), dtype=DTYPES[type.split('_')[-1]])
+            for type, size in descriptor['global'].items()
+            if type[0] in 'gt' and type != 'g_void'
+        }
+
+        self.frame_sizes = {function: max(table.values(), default=0) for function, table in descriptor['local'].items()}
+        self.arena = {
+            'l_int': np.zeros((ARENA_SIZE, lanes), dtype='int64'),
+            'l_float': np.zeros((ARENA_SIZE, lanes), dtype='float64'),
+        }
+
+        self.ip = np.zeros(lanes, dtype='int64')
+        self.base_pointer = np.zeros(lanes, dtype='int64')
+        self.stack_pointer = np.zeros(lanes, dtype='int64')
+        self.staged = np.zeros(lanes, dtype='int64')
+        self.depth = np.zeros(lanes, dtype='int64')
+        self.returns = np.zeros((STACK_SIZE, lanes), dtype='int64')
+        self.saved_bases = np.zeros((STACK_SIZE, lanes), dtype='int64')
+        self.outputs = [[] for _ in range(lanes)]
+
+        for address, values in (initial or {}).items():
+            type, index = memory_manager.resolve(int(address))
+            self.memory[type][index] = values
+
+        self.end = len(quadruples)
+        self.program = [self.decode(ip, quadruples[ip]) for ip in range(len(quadruples))]
+
+    def reader(self, address):
+        """
+        Build a function that reads a memory address for a lane mask.
+
+        Parameters:
+        - address (int): The memory address.
+
+        Returns:
+        - callable: A function receiving the lane indexes and returning their values (or a scalar for constants).
+        """
+        type, index = self.memory_manager.resolve(address)
+
+        if type == 'g_void':
+            return lambda lanes: None
+        if type.startswith('c'):
+            value = self.memory_manager.access(address)
+            return lambda lanes: value
+        if type.startswith('l'):
+            arena = self.arena
+            base_pointer = self.base_pointer
+            return lambda lanes: arena[type][base_pointer[lanes] + index, lanes]
+
+        segment = self.memory[type]
+        return lambda lanes: segment[index, lanes]
+
+    def writer(self, address, staged=False):
+        """
+        Build a function that assigns values to a memory address for a lane mask.
+
+        Values are converted to the type of the segment by NumPy.
+
+        Parameters:
+        - address (int): The memory address.
+        - staged (bool): Whether local addresses belong to the staged frame.
+
+        Returns:
+        - callable: A function receiving the lane indexes and their values.
+        """
+        type, index = self.memory_manager.resolve(address)
+
+        if type.startswith('l'):
+            arena = self.arena
+            base_pointer = self.staged if staged else self.base_pointer
+
+            def write(lanes, values):
+                arena[type][base_pointer[lanes] + index, lanes] = values
+            return write
+
+        segment = self.memory[type]
+
+        def write(lanes, values):
+            segment[index, lanes] = values
+        return write
+
+    def reserve(self, slots, depth):
+        """
+        Grow the local arena and the call stack to hold at least the given slots and depth.
+        """
+        for type, arena in self.arena.items():
+            if slots > len(arena):
+                grown = np.zeros((max(slots, 2 * len(arena)), self.lanes), dtype=arena.dtype)
+                grown[:len(arena)] = arena
+                self.arena[type] = grown
+
+        if depth > len(self.returns):
+            size = max(depth, 2 * len(self.returns))
+            for name in ('returns', 'saved_bases'):
+                stack = getattr(self, name)
+                grown = np.zeros((size, self.lanes), dtype='int64')
+                grown[:len(stack)] = stack
+                setattr(self, name, grown)
+
+    def decode(self, ip, quadruple):
+        """
+        Decode a quadruple into its handler.
+
+        Parameters:
+        - ip (int): The index of the quadruple.
+        - quadruple (Quadruple): The quadruple to decode.
+
+        Returns:
+        - callable: The handler, which executes the quadruple for the lane indexes it receives.
+        """
+        operator = quadruple.operator
+        left_operand, right_operand, result = quadruple.left_operand, quadruple.right_operand, quadruple.result
+        following = ip + 1
+        codes = OPERATORS_NUMERIC
+        instruction_pointer = self.ip
+
+        symbols = {code: symbol for symbol, code in codes.items() if symbol in OPERATOR_FUNCTIONS}
+        if operator == codes['/']:
+            function = OPERATOR_FUNCTIONS['/']
+            left, right, write = self.reader(left_operand), self.reader(right_operand), self.writer(result)
+            outputs, end = self.outputs, self.end
+
+            def handler(lanes):
+                divisors = np.broadcast_to(np.asarray(right(lanes)), lanes.shape)
+                failed = divisors == 0
+                if failed.any():
+                    for lane in lanes[failed].tolist():
+                        outputs[lane].append('ZeroDivisionError: division by zero')
+                    instruction_pointer[lanes[failed]] = end
+                    lanes = lanes[~failed]
+                write(lanes, function(left(lanes), right(lanes)))
+                instruction_pointer[lanes] = following
+            return handler
+
+        if operator in symbols:
+            function = OPERATOR_FUNCTIONS[symbols[operator]]
+            left, right, write = self.reader(left_operand), self.reader(right_operand), self.writer(result)
+
+            def handler(lanes):
+                write(lanes, function(left(lanes), right(lanes)))
+                instruction_pointer[lanes] = following
+            return handler
+
+        if operator in BRANCH_OPERATORS or operator in (codes['GOTOF'], codes['GOTOT']):
+            if operator in BRANCH_OPERATORS:
+                jump, symbol = BRANCH_OPERATORS[operator]
+                function, right = OPERATOR_FUNCTIONS[symbol], self.reader(right_operand)
+            else:
+                jump = 'GOTOF' if operator == codes['GOTOF'] else 'GOTOT'
+                function, right = (lambda value, _: value), (lambda lanes: None)
+            left = self.reader(left_operand)
+            jump_when = jump == 'GOTOT'
+
+            def handler(lanes):
+                condition = np.broadcast_to(np.asarray(function(left(lanes), right(lanes)), dtype=bool), lanes.shape)
+                instruction_pointer[lanes] = np.where(condition == jump_when, result, following)
+            return handler
+
+        if operator == codes['=']:
+            left, write = self.reader(left_operand), self.writer(result)
+
+            def handler(lanes):
+                write(lanes, left(lanes))
+                instruction_pointer[lanes] = following
+            return handler
+
+        if operator == codes['PRINT']:
+            left = self.reader(left_operand)
+            outputs = self.outputs
+
+            def handler(lanes):
+                values = np.broadcast_to(np.asarray(left(lanes)), lanes.shape)
+                for lane, value in zip(lanes.tolist(), values.tolist()):
+                    outputs[lane].append(str(value))
+                instruction_pointer[lanes] = following
+            return handler
+
+        if operator == codes['GOTO']:
+            def handler(lanes):
+                instruction_pointer[lanes] = result
+            return handler
+
+        if operator == codes['ERA']:
+            size = self.frame_sizes[result]
+            offsets = np.arange(size)[:, None]
+
+            def handler(lanes):
+                self.staged[lanes] = self.stack_pointer[lanes]
+                self.stack_pointer[lanes] += size
+                self.reserve(int(self.stack_pointer[lanes].max()), 0)
+                # The arena still holds the frames of earlier calls
+                frame = self.staged[lanes] + offsets
+                for arena in self.arena.values():
+                    arena[frame, lanes] = 0
+                instruction_pointer[lanes] = following
+            return handler
+
+        if operator == codes['PARAM']:
+            if result == -1:
+                raise ValueError('The batch engine needs programs with parameter slots')
+            left, write = self.reader(left_operand), self.writer(result, staged=True)
+
+            def handler(lanes):
+                write(lanes, left(lanes))
+                instruction_pointer[lanes] = following
+            return handler
+
+        if operator == codes['GOSUB']:
+            def handler(lanes):
+                depth = self.depth[lanes]
+                self.reserve(0, int(depth.max()) + 1)
+                self.returns[depth, lanes] = following
+                self.saved_bases[depth, lanes] = self.base_pointer[lanes]
+                self.depth[lanes] = depth + 1
+                self.base_pointer[lanes] = self.staged[lanes]
+                instruction_pointer[lanes] = result
+            return handler
+
+        if operator == codes['TAILSUB']:
+            size = self.frame_sizes[left_operand]
+            offsets = np.arange(size)[:, None]
+
+            def handler(lanes):
+                # The staged frame moves down in place of the current one
+                source = self.staged[lanes] + offsets
+                target = self.base_pointer[lanes] + offsets
+                for arena in self.arena.values():
+                    arena[target, lanes] = arena[source, lanes]
+                self.stack_pointer[lanes] = self.base_pointer[lanes] + size
+                instruction_pointer[lanes] = result
+            return handler
+
+        if operator == codes['ENDFUNC']:
+            def handler(lanes):
+                depth = self.depth[lanes] - 1
+                self.stack_pointer[lanes] = self.base_pointer[lanes]
+                self.base_pointer[lanes] = self.saved_bases[depth, lanes]
+                self.depth[lanes] = depth
+                instruction_pointer[lanes] = self.returns[depth, lanes]
+            return handler
+
+        raise ValueError(f'Invalid operator: {operator}')
+
+    def run(self):
+        """
+        Execute the program on every lane.
+
+        Returns:
+        - list: The printed lines of every lane.
+        """
+        program = self.program
+        end = len(program)
+        ip = self.ip
+
+        while True:
+            running = ip < end
+            if not running.any():
+                break
+            current = int(ip[running].min())
+            program[current](np.flatnonzero(ip == current))
+
+        return self.outputs
@@ -0,0 +1,221 @@
+"""
+Block compiled execution engine module.
+
+This module contains an execution engine that compiles every basic block of
+a program into one Python function when the program is loaded. The source of
+each function is generated from the quadruples of the block: operands become
+direct indexes into the memory segment lists, constants become literals and
+values are only converted when the operation can produce a type other than
+the one of its result segment. Every function returns the index of the next
+block to run, so running the program is a trampoline from block to block.
+"""
+
+import math
+
+from classes.cfg import ControlFlowGraph
+from classes.stack import Stack
+from classes.operators import OPERATORS_NUMERIC, BRANCH_OPERATORS
+
+# Python operators of the arithmetic and relational quadruples
+BINARY_OPERATORS = {
+    OPERATORS_NUMERIC[operator]: operator
+    for operator in ('-', '+', '*', '/', '<', '>', '<=', '>=', '==', '!=')
+}
+
+ASSIGN = OPERATORS_NUMERIC['=']
+PRINT = OPERATORS_NUMERIC['PRINT']
+GOTO = OPERATORS_NUMERIC['GOTO']
+GOTOF = OPERATORS_NUMERIC['GOTOF']
+GOTOT = OPERATORS_NUMERIC['GOTOT']
+GOSUB = OPERATORS_NUMERIC['GOSUB']
+ERA = OPERATORS_NUMERIC['ERA']
+ENDFUNC = OPERATORS_NUMERIC['ENDFUNC']
+PARAM = OPERATORS_NUMERIC['PARAM']
+TAILSUB = OPERATORS_NUMERIC['TAILSUB']
+
+
+class BlockEngine:
+    """
+    This class represents the block compiled execution engine.
+
+    Attributes:
+    - memory_manager (MemoryManager): The runtime memory, already described and allocated.
+    - function_exit_stack (Stack): The return addresses of the active function calls.
+    - source (str): The generated source of the block functions.
+    - program (list): The block functions, indexed by the quadruple each block starts at.
+    - frame_used (bool): Whether the block being generated reads or writes the current frame.
+    """
+
+    def __init__(self, memory_manager, quadruples):
+        self.memory_manager = memory_manager
+        self.function_exit_stack = Stack('function_exit_stack')
+        self.frame_used = False
+
+        graph = ControlFlowGraph(quadruples)
+        blocks = [block for block in graph.blocks.values() if block.quadruples]
+        self.source = '\n\n'.join(self.generate(block) for block in blocks)
+
+        namespace = self.namespace()
+        exec(compile(self.source, '<blocks>', 'exec'), namespace)
+
+        self.program = [None] * (len(quadruples) + 1)
+        for block in blocks:
+            self.program[block.start] = namespace[f'block_{block.start}']
+
+    def namespace(self):
+        """
+        Build the names the block functions run with.
+
+        Returns:
+        - dict: The global memory segments by type, the frame stacks and the call helpers.
+        """
+        memory_manager = self.memory_manager
+        namespace = {type: segment.memory for type, segment in memory_manager.global_frame().items()}
+        namespace.update({
+            'frames': memory_manager.memory.stack,
+            'pending': memory_manager.pending.stack,
+            'allocate_frame': memory_manager.allocate_frame,
+            'activate_local': memory_manager.activate_local,
+            'replace_local': memory_manager.replace_local,
+            'deallocate_local': memory_manager.deallocate_local,
+            'bind': memory_manager.bind,
+            'push': self.function_exit_stack.push,
+            'pop': self.function_exit_stack.pop,
+        })
+        return namespace
+
+    def value_type(self, address):
+        """
+        Get the type of the values stored at a memory address [void, int, float, bool, string].
+        """
+        return self.memory_manager.resolve(address)[0].split('_')[-1]
+
+    def operand(self, address):
+        """
+        Generate the expression that reads a memory address.
+
+        Parameters:
+        - address (int): The memory address.
+
+        Returns:
+        - str: The expression.
+        """
+        type, index = self.memory_manager.resolve(address)
+
+        if type == 'g_void':
+            return 'None'
+        if type.startswith('c'):
+            value = self.memory_manager.access(address)
+            if not (isinstance(value, float) and not math.isfinite(value)):
+                return repr(value)
+        if type.startswith('l'):
+            self.frame_used = True
+            return f'frame[{type!r}].memory[{index}]'
+        return f'{type}[{index}]'
+
+    def store(self, address, expression, produced, staged=False):
+        """
+        Generate the statement that assigns an expression to a memory address.
+
+        Parameters:
+        - address (int): The memory address.
+        - expression (str): The expression of the value.
+        - produced (str): The type of the value, it is converted when it differs from the segment type.
+        - staged (bool): Whether local addresses belong to the staged frame.
+
+        Returns:
+        - str: The statement.
+        """
+        type, index = self.memory_manager.resolve(address)
+        value_type = type.split('_')[-1]
+        if produced != value_type:
+            expression = f'{value_type}({expression})'
+
+        if type.startswith('l'):
+            if staged:
+                return f'pending[-1][{type!r}].memory[{index}] = {expression}'
+            self.frame_used = True
+            return f'frame[{type!r}].memory[{index}] = {expression}'
+        return f'{type}[{index}] = {expression}'
+
+    def generate(self, block):
+        """
+        Generate the source of the function of a basic block.
+
+        Parameters:
+        - block (BasicBlock): The block.
+
+        Returns:
+        - str: The source of the function, named after the index of its first quadruple.
+        """
+        lines = []
+        following = block.start + len(block.quadruples)
+        self.frame_used = False
+
+        for ip, q in enumerate(block.quadruples, block.start):
+            operator = q.operator
+
+            if operator in BINARY_OPERATORS:
+                symbol = BINARY_OPERATORS[operator]
+                if symbol in ('<', '>', '<=', '>=', '==', '!='):
+                    produced = 'bool'
+                elif symbol == '/':
+                    produced = 'float'
+                else:
+                    operand_types = (self.value_type(q.left_operand), self.value_type(q.right_operand))
+                    produced = 'float' if 'float' in operand_types else 'int'
+                expression = f'{self.operand(q.left_operand)} {symbol} {self.operand(q.right_operand)}'
+                lines.append(self.store(q.result, expression, produced))
+            elif operator == ASSIGN:
+                lines.append(self.store(q.result, self.operand(q.left_operand), self.value_type(q.left_operand)))
+            elif operator == PRINT:
+                lines.append(f'print({self.operand(q.left_operand)})')
+            elif operator == GOTO:
+                lines.append(f'return {q.result}')
+            elif operator == GOTOF:
+                lines.append(f'if not {self.operand(q.left_operand)}: return {q.result}')
+            elif operator == GOTOT:
+                lines.append(f'if {self.operand(q.left_operand)}: return {q.result}')
+            elif operator in BRANCH_OPERATORS:
+                jump, symbol = BRANCH_OPERATORS[operator]
+                condition = f'{self.operand(q.left_operand)} {symbol} {self.operand(q.right_operand)}'
+                if jump == 'GOTOF':
+                    condition = f'not ({condition})'
+                lines.append(f'if {condition}: return {q.result}')
+            elif operator == ERA:
+                lines.append(f'allocate_frame({q.result})')
+            elif operator == PARAM:
+                if q.result != -1:
+                    lines.append(self.store(q.result, self.operand(q.left_operand), self.value_type(q.result), staged=True))
+                else:
+                    # Programs without parameter slots bind to the next free one
+                    type = 'l_float' if self.value_type(q.left_operand) == 'float' else 'l_int'
+                    lines.append(f'bind({type!r}, {self.operand(q.left_operand)})')
+            elif operator == GOSUB:
+                lines += ['activate_local()', f'push({ip + 1})', f'return {q.result}']
+            elif operator == TAILSUB:
+                lines += ['replace_local()', f'return {q.result}']
+            elif operator == ENDFUNC:
+                lines += ['deallocate_local()', 'return pop()']
+            else:
+                raise ValueError(f'Invalid operator: {operator}')
+
+        if not lines or not lines[-1].startswith('return'):
+            lines.append(f'return {following}')
+
+        # Blocks never change the current frame before their last quadruple
+        if self.frame_used:
+            lines.insert(0, 'frame = frames[-1]')
+
+        return f'def block_{block.start}():\n' + '\n'.join(f'    {line}' for line in lines)
+
+    def run(self):
+        """
+        Execute the compiled blocks from the first quadruple.
+        """
+        program = self.program
+        end = len(program) - 1
+        ip = 0
+
+        while ip < end:
+            ip = program[ip]()
@@ -0,0 +1,208 @@
+"""
+Compile cache module.
+
+This module contains a content-addressed cache of compiled programs. The key
+of a program hashes its source, the version of the compiler and the flags
+that change the object file (optimization passes, their options and the
+object format), so a source compiled before with the same compiler and flags
+gets its object file back without being parsed.
+
+Entries are written to a temporary file and renamed into place, so processes
+compiling at the same time can share the cache: a reader sees either a
+complete entry or none. Reading an entry refreshes its modification time and
+the entries modified longest ago are removed when the cache grows over its
+size limit. Eviction scans the whole cache, so it runs once per compiler run
+(after a whole batch) rather than after every entry written.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import importlib.util
+
+# Modules whose source decides the object files the compiler writes
+COMPILER_MODULES = (
+    'x_lexer',
+    'x_scanner',
+    'x_parser',
+    'classes.context',
+    'classes.memory',
+    'classes.objectfile',
+    'classes.operators',
+    'classes.optimizer',
+    'classes.cfg',
+    'classes.quadruples',
+    'classes.semantic',
+    'classes.symbols',
+    'classes.stack',
+    'classes.tables',
+)
+
+# Default cache directory and size limit
+CACHE_DIR = '.duckcache'
+CACHE_SIZE = 256 * 1024 * 1024
+
+ENTRY_EXTENSION = '.dk'
+
+# Number of characters of a source hashed at a time
+CHUNK_SIZE = 1 << 16
+
+
+def compiler_version():
+    """
+    Get the version of the compiler: a hash of the source of the modules that produce object files.
+
+    Any change to the compiler, including the grammar and the optimization
+    passes, gives a new version, so entries written by an older compiler are
+    never returned.
+
+    Returns:
+    - str: The hex digest.
+    """
+    digest = hashlib.sha256()
+    for name in COMPILER_MODULES:
+        with open(importlib.util.find_spec(name).origin, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+class CompileCache:
+    """
+    This class represents a cache of object files on disk.
+
+    Attributes:
+    - directory (str): The cache directory, entries are stored in subdirectories named after the first two digits of their key.
+    - max_size (int): The size limit of the cache in bytes.
+    - version (str): The compiler version, part of every key.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_size=CACHE_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self.version = compiler_version()
+
+    def key(self, source, flags):
+        """
+        Compute the key of a compilation.
+
+        Parameters:
+        - source (bytes | file): The source, or a text file object hashed in chunks from its current position.
+        - flags (dict): The flags that change the object file, serializable to JSON.
+
+        Returns:
+        - str: The hex digest.
+        """
+        digest = hashlib.sha256()
+        if isinstance(source, bytes):
+            digest.update(source)
+        else:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), ''):
+                digest.update(chunk.encode('utf-8'))
+        digest.update(self.version.encode())
+        digest.update(json.dumps(flags, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def path(self, key):
+        """
+        Get the path of the entry of a key.
+        """
+        return os.path.join(self.directory, key[:2], key + ENTRY_EXTENSION)
+
+    def get(self, key):
+        """
+        Read an entry.
+
+        Parameters:
+        - key (str): The key.
+
+        Returns:
+        - bytes: The object file, or None if it isn't cached.
+        """
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+            # The modification time orders the entries for eviction
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def put(self, key, data):
+        """
+        Write an entry.
+
+        Parameters:
+        - key (str): The key.
+        - data (bytes): The object file.
+        """
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(data)
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    def entries(self):
+        """
+        List the entries of the cache.
+
+        Returns:
+        - list: The (modification time, size, path) of every entry.
+        """
+        entries = []
+        try:
+            directories = list(os.scandir(self.directory))
+        except OSError:
+            return entries
+
+        for directory in directories:
+            if not directory.is_dir():
+                continue
+            for entry in os.scandir(directory.path):
+                if entry.name.endswith(ENTRY_EXTENSION):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits its size limit.
+
+        Returns:
+        - int: The number of entries removed.
+        """
+        entries = self.entries()
+        size = sum(entry[1] for entry in entries)
+        removed = 0
+
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                # Another process removed it first
+                pass
+            size -= entry_size
+        return removed
+
+    def clear(self):
+        """
+        Remove every entry of the cache.
+        """
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,447 @@
+"""
+Control flow graph module.
+
+This module contains the control flow graph built over the quadruples of a
+program. Quadruples are split into basic blocks, straight sequences that are
+only entered by their first quadruple and only left by their last one, which
+are linked by the jumps between them:
+
+    GOTO        jump edge
+    GOTOF/T     jump edge and fallthrough edge (also GOTOF<, GOTOT>=, ...)
+    GOSUB       fallthrough edge to the return point and call edge to the function
+    TAILSUB     call edge to the function, which returns to the caller of the block
+    ENDFUNC     no edges, the function returns to its caller
+
+Jump targets are kept as blocks, so blocks can be removed, added and moved,
+and linearize() turns the graph back into quadruples with the jump targets
+and the function indexes of the function directory renumbered.
+"""
+
+import json
+
+from classes.operators import OPERATORS_NUMERIC, CONDITIONAL_JUMP_OPERATORS
+from classes.quadruples import Quadruple
+
+GOTO = OPERATORS_NUMERIC['GOTO']
+GOSUB = OPERATORS_NUMERIC['GOSUB']
+TAILSUB = OPERATORS_NUMERIC['TAILSUB']
+ENDFUNC = OPERATORS_NUMERIC['ENDFUNC']
+
+# Operator names by numeric code
+OPERATOR_NAMES = {code: name for name, code in OPERATORS_NUMERIC.items()}
+
+
+class BasicBlock:
+    """
+    This class represents a basic block of the control flow graph.
+
+    Attributes:
+    - id (int): The block id.
+    - start (int): The index of the first quadruple in the original program.
+    - quadruples (list): The quadruples of the block.
+    - jump (int): The block id the last quadruple jumps to (GOTO and conditional jumps).
+    - fallthrough (int): The block id executed after the block when it does not jump.
+    - call (int): The block id of the function called by the last quadruple (GOSUB, TAILSUB).
+    - predecessors (list): The ids of the blocks with an edge to the block.
+    """
+
+    def __init__(self, id, start, quadruples=None):
+        self.id = id
+        self.start = start
+        self.quadruples = quadruples if quadruples is not None else []
+        self.jump = None
+        self.fallthrough = None
+        self.call = None
+        self.predecessors = []
+
+    def successors(self):
+        """
+        Get the successors of the block.
+
+        Returns:
+        - list: The ids of the blocks control can reach after the block, call edges excluded.
+        """
+        return [block for block in (self.fallthrough, self.jump) if block is not None]
+
+    def terminator(self):
+        """
+        Get the last quadruple of the block.
+
+        Returns:
+        - Quadruple: The last quadruple or None if the block is empty.
+        """
+        return self.quadruples[-1] if self.quadruples else None
+
+    def __str__(self):
+        return f'B{self.id} ({self.start}): ' + ', '.join(f'({q})' for q in self.quadruples)
+
+    def __repr__(self):
+        return str(self)
+
+
+class Loop:
+    """
+    This class represents a natural loop.
+
+    Attributes:
+    - header (int): The id of the block that dominates the loop.
+    - blocks (set): The ids of the blocks of the loop, header included.
+    - latches (set): The ids of the blocks with a back edge to the header.
+    """
+
+    def __init__(self, header, blocks, latches):
+        self.header = header
+        self.blocks = blocks
+        self.latches = latches
+
+    def __str__(self):
+        return f'Loop B{self.header}: ' + ', '.join(f'B{block}' for block in sorted(self.blocks))
+
+    def __repr__(self):
+        return str(self)
+
+
+class ControlFlowGraph:
+    """
+    This class represents the control flow graph of a program.
+
+    The blocks are kept in layout order, the order linearize() emits them.
+    An empty exit block is always the last one, jumps to the end of the
+    program land on it.
+
+    Attributes:
+    - blocks (dict): The basic blocks by id, in layout order.
+    - entry (int): The id of the entry block.
+    - exit (int): The id of the exit block.
+    - functions (dict): The id of the entry block of every function by name.
+    - function_directory (SymbolTable): The function directory, its indexes are updated by linearize().
+    """
+
+    def __init__(self, quadruples, function_directory=None):
+        self.blocks = {}
+        self.entry = None
+        self.exit = None
+        self.functions = {}
+        self.function_directory = function_directory
+        self.next_id = 0
+        self.build(list(quadruples))
+
+    def build(self, program):
+        """
+        Split the quadruples into basic blocks and link them.
+
+        Parameters:
+        - program (list): The quadruples of the program.
+        """
+        end = len(program)
+        function_starts = {}
+        if self.function_directory is not None:
+            for name, symbol in self.function_directory.symbols.items():
+                if symbol.index is not None:
+                    function_starts[symbol.index] = name
+
+        # Leaders are the first quadruple, jump targets, function starts and quadruples after a jump
+        leaders = {0, end} | set(function_starts)
+        for i, quadruple in enumerate(program):
+            if quadruple.operator in (GOTO, GOSUB, TAILSUB) or quadruple.operator in CONDITIONAL_JUMP_OPERATORS:
+                leaders.add(quadruple.result)
+                leaders.add(i + 1)
+            elif quadruple.operator == ENDFUNC:
+                leaders.add(i + 1)
+
+        block_at = {}
+        leaders = sorted(leader for leader in leaders if 0 <= leader <= end)
+        for start, stop in zip(leaders, leaders[1:] + [None]):
+            block = self.new_block(program[start:stop] if stop is not None else [], start)
+            block_at[start] = block.id
+
+        self.entry = block_at[0]
+        self.exit = block_at[end]
+        self.functions = {name: block_at[index] for index, name in function_starts.items()}
+
+        for block in self.blocks.values():
+            if block.id == self.exit:
+                continue
+
+            last = block.terminator()
+            following = block_at.get(block.start + len(block.quadruples))
+
+            if last.operator == GOTO:
+                block.jump = block_at[last.result]
+            elif last.operator in CONDITIONAL_JUMP_OPERATORS:
+                block.jump = block_at[last.result]
+                block.fallthrough = following
+            elif last.operator == GOSUB:
+                block.call = block_at[last.result]
+                block.fallthrough = following
+            elif last.operator == TAILSUB:
+                block.call = block_at[last.result]
+            elif last.operator != ENDFUNC:
+                block.fallthrough = following
+
+        self.update_predecessors()
+
+    def new_block(self, quadruples=None, start=None, before=None):
+        """
+        Add a new block to the graph.
+
+        Parameters:
+        - quadruples (list): The quadruples of the block.
+        - start (int): The index of the first quadruple in the original program.
+        - before (int): The id of the block the new one is placed before, at the end when None.
+
+        Returns:
+        - BasicBlock: The new block.
+        """
+        block = BasicBlock(self.next_id, start, quadruples)
+        self.next_id += 1
+
+        if before is None:
+            self.blocks[block.id] = block
+        else:
+            blocks = {}
+            for id, other in self.blocks.items():
+                if id == before:
+                    blocks[block.id] = block
+                blocks[id] = other
+            self.blocks = blocks
+
+        return block
+
+    def remove_block(self, id):
+        """
+        Remove a block from the graph, edges to it must be removed first.
+
+        Parameters:
+        - id (int): The id of the block.
+        """
+        del self.blocks[id]
+        self.functions = {name: block for name, block in self.functions.items() if block != id}
+
+    def update_predecessors(self):
+        """
+        Recompute the predecessors of every block from their successors.
+        """
+        for block in self.blocks.values():
+            block.predecessors = []
+        for block in self.blocks.values():
+            for successor in block.successors():
+                self.blocks[successor].predecessors.append(block.id)
+
+    def roots(self):
+        """
+        Get the blocks control enters the graph from.
+
+        Returns:
+        - list: The ids of the entry block and of the entry block of every function.
+        """
+        return [self.entry] + [block for block in self.functions.values() if block != self.entry]
+
+    def reachable(self, roots, calls=False):
+        """
+        Get the blocks reachable from a list of blocks.
+
+        Parameters:
+        - roots (list): The ids of the blocks to start from.
+        - calls (bool): Whether to follow call edges into functions.
+
+        Returns:
+        - list: The ids of the reachable blocks, in layout order.
+        """
+        visited = set()
+        pending = list(roots)
+        while pending:
+            id = pending.pop()
+            if id in visited:
+                continue
+            visited.add(id)
+            block = self.blocks[id]
+            pending.extend(block.successors())
+            if calls and block.call is not None:
+                pending.append(block.call)
+
+        return [id for id in self.blocks if id in visited]
+
+    def dominators(self):
+        """
+        Compute the dominators of every reachable block.
+
+        A block dominates another one when every path from the root of its
+        function (or from the entry block) to the other one goes through it.
+
+        Returns:
+        - dict: The set of the ids of the dominators of every block by id.
+        """
+        dominators = {}
+        for root in self.roots():
+            nodes = self.reachable([root])
+            everything = set(nodes)
+            dominated = {id: set(everything) for id in nodes}
+            dominated[root] = {root}
+
+            changed = True
+            while changed:
+                changed = False
+                for id in nodes:
+                    if id == root:
+                        continue
+                    predecessors = [dominated[p] for p in self.blocks[id].predecessors if p in everything]
+                    new = set.intersection(*predecessors) if predecessors else set()
+                    new.add(id)
+                    if new != dominated[id]:
+                        dominated[id] = new
+                        changed = True
+
+            dominators.update(dominated)
+        return dominators
+
+    def natural_loops(self, dominators=None):
+        """
+        Find the natural loops of the graph.
+
+        Every back edge, an edge to a block that dominates its source, forms a
+        loop with the blocks that reach its source without going through the
+        header. Loops that share a header are merged.
+
+        Parameters:
+        - dominators (dict): The dominators computed by dominators(), computed when None.
+
+        Returns:
+        - list: The loops, innermost loops first.
+        """
+        if dominators is None:
+            dominators = self.dominators()
+
+        loops = {}
+        for id, dominated in dominators.items():
+            for successor in self.blocks[id].successors():
+                if successor not in dominated:
+                    continue
+
+                loop = loops.setdefault(successor, Loop(successor, {successor}, set()))
+                loop.latches.add(id)
+
+                pending = [id]
+                while pending:
+                    block = pending.pop()
+                    if block in loop.blocks:
+                        continue
+                    loop.blocks.add(block)
+                    pending.extend(self.blocks[block].predecessors)
+
+        return sorted(loops.values(), key=lambda loop: len(loop.blocks))
+
+    def linearize(self):
+        """
+        Turn the graph back into quadruples.
+
+        The blocks are emitted in layout order, the entry block always first
+        and the exit block always last. Jump targets are renumbered,
+        a GOTO is added after the blocks whose fallthrough block is not the
+        next one, and the function indexes of the function directory are
+        updated.
+
+        Returns:
+        - list: The quadruples of the program.
+        """
+        order = [self.entry] + [id for id in self.blocks if id not in (self.entry, self.exit)] + [self.exit]
+
+        # The start of every block, counting the jumps added after blocks that are moved apart
+        starts = {}
+        index = 0
+        for position, id in enumerate(order):
+            block = self.blocks[id]
+            starts[id] = index
+            index += len(block.quadruples)
+            following = order[position + 1] if position + 1 < len(order) else None
+            if block.fallthrough is not None and block.fallthrough != following:
+                index += 1
+
+        program = []
+        for position, id in enumerate(order):
+            block = self.blocks[id]
+            last = block.terminator()
+            if block.jump is not None:
+                last.result = starts[block.jump]
+            elif block.call is not None:
+                last.result = starts[block.call]
+
+            program.extend(block.quadruples)
+
+            following = order[position + 1] if position + 1 < len(order) else None
+            if block.fallthrough is not None and block.fallthrough != following:
+                program.append(Quadruple(GOTO, -1, -1, starts[block.fallthrough]))
+
+        if self.function_directory is not None:
+            for name, block in self.functions.items():
+                self.function_directory.lookup(name).update_index(starts[block])
+
+        return program
+
+    def to_json(self):
+        """
+        Dump the graph as JSON.
+
+        Returns:
+        - str: The graph as JSON {entry, exit, functions, blocks}.
+        """
+        return json.dumps({
+            'entry': self.entry,
+            'exit': self.exit,
+            'functions': self.functions,
+            'blocks': [
+                {
+                    'id': block.id,
+                    'start': block.start,
+                    'quadruples': [[q.operator, q.left_operand, q.right_operand, q.result] for q in block.quadruples],
+                    'successors': block.successors(),
+                    'predecessors': block.predecessors,
+                    'call': block.call,
+                }
+                for block in self.blocks.values()
+            ],
+        }, indent=2)
+
+    def to_dot(self):
+        """
+        Dump the graph in the Graphviz DOT language.
+
+        Returns:
+        - str: The graph as a DOT digraph, call edges are dashed.
+        """
+        names = {block: name for name, block in self.functions.items()}
+        lines = ['digraph cfg {', '    node [shape=box, fontname="monospace"];']
+
+        for block in self.blocks.values():
+            title = f'B{block.id}'
+            if block.id == self.entry:
+                title += ' entry'
+            elif block.id == self.exit:
+                title += ' exit'
+            elif block.id in names:
+                title += f' {names[block.id]}'
+
+            label = [title]
+            for q in block.quadruples:
+                label.append(f'{OPERATOR_NAMES.get(q.operator, q.operator)} {q.left_operand} {q.right_operand} {q.result}')
+            lines.append(f'    B{block.id} [label="' + '\\l'.join(label) + '\\l"];')
+
+        for block in self.blocks.values():
+            if block.jump is not None:
+                name = OPERATOR_NAMES[block.terminator().operator]
+                label = 'false' if name.startswith('GOTOF') else 'true' if name.startswith('GOTOT') else None
+                attributes = f' [label="{label}"]' if label else ''
+                lines.append(f'    B{block.id} -> B{block.jump}{attributes};')
+            if block.fallthrough is not None:
+                lines.append(f'    B{block.id} -> B{block.fallthrough};')
+            if block.call is not None:
+                lines.append(f'    B{block.id} -> B{block.call} [style=dashed];')
+
+        lines.append('}')
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return '\n'.join(str(block) for block in self.blocks.values())
+
+    def __repr__(self):
+        return str(self)
@@ -0,0 +1,46 @@
+"""
+Compilation context module.
+
+This module contains the state of one compilation: the symbol tables, the
+semantic stacks used by the grammar actions, the quadruples and the memory
+assigner. The parser creates a fresh context for every program, so the same
+process can compile many programs one after another.
+"""
+
+from classes.stack import Stack
+from classes.quadruples import QuadrupleBuilder
+from classes.memory import MemoryAssigner
+
+
+class CompilationContext:
+    """
+    This class represents the state of the compilation of one program.
+
+    Attributes:
+    - function_directory (SymbolTable): The symbol table of the program, None until the program is declared.
+    - scope_stack (Stack): The scopes being declared (function declaration).
+    - id_stack (Stack): The identifiers being declared (variable declaration).
+    - jump_stack (Stack): The quadruples waiting for a jump target (conditions and cycles).
+    - f_call_stack (Stack): The functions being called.
+    - f_call_param_stack (Stack): The arguments of the function being called.
+    - f_call_param_type_stack (Stack): The types of the arguments of the function being called.
+    - operator_stack (Stack): The pending operators (expressions).
+    - operand_stack (Stack): The operand addresses (expressions).
+    - operand_type_stack (Stack): The operand types (expressions).
+    - quadruples (QuadrupleBuilder): The generated quadruples.
+    - memory_assigner (MemoryAssigner): The memory addresses of the program.
+    """
+
+    def __init__(self):
+        self.function_directory = None
+        self.scope_stack = Stack('scope_stack')
+        self.id_stack = Stack('id_stack')
+        self.jump_stack = Stack('jump_stack')
+        self.f_call_stack = Stack('f_call_stack')
+        self.f_call_param_stack = Stack('f_call_param_stack')
+        self.f_call_param_type_stack = Stack('f_call_param_type_stack')
+        self.operator_stack = Stack('operator_stack')
+        self.operand_stack = Stack('operand_stack')
+        self.operand_type_stack = Stack('operand_type_stack')
+        self.quadruples = QuadrupleBuilder()
+        self.memory_assigner = MemoryAssigner()
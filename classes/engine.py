@@ -0,0 +1,261 @@
+"""
+Execution engine module.
+
+This module contains a table-driven execution engine for the virtual machine.
+Every quadruple is decoded once, when the program is loaded, into a handler
+with its operands already bound. Operand addresses are resolved into their
+memory slots at the same time, so no address is classified while running,
+and values are only converted when the operation can produce a type other
+than the one of its result segment.
+Running the program is then a loop that calls the handler at the instruction
+pointer, which returns the next one.
+"""
+
+import operator
+
+from classes.stack import Stack
+from classes.operators import OPERATORS_NUMERIC, OPERATOR_FUNCTIONS, BRANCH_OPERATORS
+
+
+def _value_type(memory_manager, address):
+    """
+    Get the type of the values stored at a memory address [void, int, float, bool, string].
+    """
+    return memory_manager.resolve(address)[0].split('_')[-1]
+
+
+def _binary(function, produces=None):
+    """
+    Build the decoder of a binary operation (arithmetic and relational operators).
+
+    Parameters:
+    - function (callable): The operation applied to both operands.
+    - produces (str): The type of the values produced, numeric promotion of the operands when None.
+    """
+    def decode(engine, ip, left_operand, right_operand, result):
+        memory_manager = engine.memory_manager
+        produced = produces
+        if produced is None:
+            operand_types = (_value_type(memory_manager, left_operand), _value_type(memory_manager, right_operand))
+            produced = 'float' if 'float' in operand_types else 'int'
+
+        left = memory_manager.reader(left_operand)
+        right = memory_manager.reader(right_operand)
+        write = memory_manager.writer(result, cast=produced != _value_type(memory_manager, result))
+        following = ip + 1
+
+        def handler():
+            write(function(left(), right()))
+            return following
+        return handler
+    return decode
+
+
+def _assign(engine, ip, left_operand, right_operand, result):
+    memory_manager = engine.memory_manager
+    left = memory_manager.reader(left_operand)
+    write = memory_manager.writer(
+        result, cast=_value_type(memory_manager, left_operand) != _value_type(memory_manager, result)
+    )
+    following = ip + 1
+
+    def handler():
+        write(left())
+        return following
+    return handler
+
+
+def _print(engine, ip, left_operand, right_operand, result):
+    left = engine.memory_manager.reader(left_operand)
+    following = ip + 1
+
+    def handler():
+        print(left())
+        return following
+    return handler
+
+
+def _goto(engine, ip, left_operand, right_operand, result):
+    def handler():
+        return result
+    return handler
+
+
+def _gotof(engine, ip, left_operand, right_operand, result):
+    left = engine.memory_manager.reader(left_operand)
+    following = ip + 1
+
+    def handler():
+        return following if left() else result
+    return handler
+
+
+def _gotot(engine, ip, left_operand, right_operand, result):
+    left = engine.memory_manager.reader(left_operand)
+    following = ip + 1
+
+    def handler():
+        return result if left() else following
+    return handler
+
+
+def _branch(function, jump_when):
+    """
+    Build the decoder of a fused compare-and-branch operation.
+
+    Parameters:
+    - function (callable): The comparison applied to both operands.
+    - jump_when (bool): The comparison result that takes the jump (False for GOTOF, True for GOTOT).
+    """
+    def decode(engine, ip, left_operand, right_operand, result):
+        left = engine.memory_manager.reader(left_operand)
+        right = engine.memory_manager.reader(right_operand)
+        following = ip + 1
+
+        if jump_when:
+            def handler():
+                return result if function(left(), right()) else following
+        else:
+            def handler():
+                return following if function(left(), right()) else result
+        return handler
+    return decode
+
+
+def _gosub(engine, ip, left_operand, right_operand, result):
+    activate_local = engine.memory_manager.activate_local
+    push = engine.function_exit_stack.push
+    following = ip + 1
+
+    def handler():
+        activate_local()
+        push(following)
+        return result
+    return handler
+
+
+def _tailsub(engine, ip, left_operand, right_operand, result):
+    replace_local = engine.memory_manager.replace_local
+
+    def handler():
+        # The callee returns straight to the caller of the current function
+        replace_local()
+        return result
+    return handler
+
+
+def _era(engine, ip, left_operand, right_operand, result):
+    allocate_frame = engine.memory_manager.allocate_frame
+    following = ip + 1
+
+    def handler():
+        # Allocate temporal memory
+        allocate_frame(result)
+        return following
+    return handler
+
+
+def _endfunc(engine, ip, left_operand, right_operand, result):
+    deallocate_local = engine.memory_manager.deallocate_local
+    pop = engine.function_exit_stack.pop
+
+    def handler():
+        # Deallocate temporal memory
+        deallocate_local()
+        return pop()
+    return handler
+
+
+def _param(engine, ip, left_operand, right_operand, result):
+    left = engine.memory_manager.reader(left_operand)
+    following = ip + 1
+
+    if result != -1:
+        write = engine.memory_manager.writer(result, cast=False, staged=True)
+
+        def handler():
+            write(left())
+            return following
+        return handler
+
+    # Programs without parameter slots bind to the next free one
+    bind = engine.memory_manager.bind
+    type = 'l_float' if _value_type(engine.memory_manager, left_operand) == 'float' else 'l_int'
+
+    def handler():
+        bind(type, left())
+        return following
+    return handler
+
+
+DISPATCH_TABLE = {
+    OPERATORS_NUMERIC['-']: _binary(operator.sub),
+    OPERATORS_NUMERIC['+']: _binary(operator.add),
+    OPERATORS_NUMERIC['*']: _binary(operator.mul),
+    OPERATORS_NUMERIC['/']: _binary(operator.truediv, 'float'),
+    OPERATORS_NUMERIC['<']: _binary(operator.lt, 'bool'),
+    OPERATORS_NUMERIC['>']: _binary(operator.gt, 'bool'),
+    OPERATORS_NUMERIC['<=']: _binary(operator.le, 'bool'),
+    OPERATORS_NUMERIC['>=']: _binary(operator.ge, 'bool'),
+    OPERATORS_NUMERIC['==']: _binary(operator.eq, 'bool'),
+    OPERATORS_NUMERIC['!=']: _binary(operator.ne, 'bool'),
+    OPERATORS_NUMERIC['=']: _assign,
+    OPERATORS_NUMERIC['PRINT']: _print,
+    OPERATORS_NUMERIC['GOTO']: _goto,
+    OPERATORS_NUMERIC['GOTOF']: _gotof,
+    OPERATORS_NUMERIC['GOTOT']: _gotot,
+    OPERATORS_NUMERIC['GOSUB']: _gosub,
+    OPERATORS_NUMERIC['ERA']: _era,
+    OPERATORS_NUMERIC['ENDFUNC']: _endfunc,
+    OPERATORS_NUMERIC['PARAM']: _param,
+    OPERATORS_NUMERIC['TAILSUB']: _tailsub,
+    **{
+        code: _branch(OPERATOR_FUNCTIONS[relational], jump == 'GOTOT')
+        for code, (jump, relational) in BRANCH_OPERATORS.items()
+    },
+}
+
+
+class Engine:
+    """
+    This class represents the table-driven execution engine.
+
+    Attributes:
+    - memory_manager (MemoryManager): The runtime memory, already described and allocated.
+    - function_exit_stack (Stack): The return addresses of the active function calls.
+    - program (list): The decoded handlers, indexed by quadruple.
+    """
+
+    def __init__(self, memory_manager, quadruples):
+        self.memory_manager = memory_manager
+        self.function_exit_stack = Stack('function_exit_stack')
+        self.program = [self.decode(ip, quadruples[ip]) for ip in range(len(quadruples))]
+
+    def decode(self, ip, quadruple):
+        """
+        Decode a quadruple into its handler.
+
+        Parameters:
+        - ip (int): The index of the quadruple.
+        - quadruple (Quadruple): The quadruple to decode.
+
+        Returns:
+        - callable: The handler, which executes the quadruple and returns the next index.
+        """
+        if quadruple.operator not in DISPATCH_TABLE:
+            raise ValueError(f'Invalid operator: {quadruple.operator}')
+
+        return DISPATCH_TABLE[quadruple.operator](
+            self, ip, quadruple.left_operand, quadruple.right_operand, quadruple.result
+        )
+
+    def run(self):
+        """
+        Execute the decoded program from its first quadruple.
+        """
+        program = self.program
+        end = len(program)
+        ip = 0
+
+        while ip < end:
+            ip = program[ip]()
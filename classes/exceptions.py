@@ -27,3 +27,18 @@ class InvalidTypeError(CompilerError):
 class InvalidOperationError(CompilerError):
     """Exception raised when an operation is invalid."""
     pass
+
+
+class InvalidSyntaxError(CompilerError):
+    """Exception raised when the source does not follow the grammar."""
+    pass
+
+
+class MemoryOverflowError(CompilerError):
+    """Exception raised when a memory segment runs out of addresses."""
+    pass
+
+
+class InvalidObjectFileError(CompilerError):
+    """Exception raised when a compiled object file is malformed."""
+    pass
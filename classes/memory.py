@@ -7,7 +7,12 @@ is a common intermediate representation in compilers, representing the
 allocation of memory for variables and tables.
 """
 
+from array import array
+from functools import partial
+from operator import getitem, setitem
+
 from classes.stack import Stack
+from classes.exceptions import MemoryOverflowError
 
 OFFSETS = {
     'g_void': 500,
@@ -21,12 +26,43 @@ OFFSETS = {
     'c_string': 8000,
     'l_int': 9000,
     'l_float': 10000,
+    'c_bool': 11000,
+}
+
+# First address after each memory segment
+LIMITS = {
+    type: min([offset for offset in OFFSETS.values() if offset > OFFSETS[type]], default=None)
+    for type in OFFSETS
+}
+
+# Array type codes of the segments with typed storage
+TYPECODES = {
+    'g_int': 'q',
+    'g_float': 'd',
+    't_int': 'q',
+    't_float': 'd',
+    'c_int': 'q',
+    'c_float': 'd',
+    'l_int': 'q',
+    'l_float': 'd',
+}
+
+CASTS = {
+    'void': lambda value: None,
+    'int': int,
+    'float': float,
+    'bool': bool,
+    'string': str,
 }
 
 class MemoryAssigner:
     """
     This class manages the memory allocation for variables, parameters and constants in the
     compilation process.
+
+    Temporals are recycled: once a temporal is consumed it is released and the next
+    temporal of its type reuses the address, so the temporal segments only grow to
+    the largest number of temporals alive at the same time.
     """
 
     def __init__(self):
@@ -42,29 +78,68 @@ class MemoryAssigner:
                 'c_int': OFFSETS['c_int'],
                 'c_float': OFFSETS['c_float'],
                 'c_string': OFFSETS['c_string'],
+                'c_bool': OFFSETS['c_bool'],
             },
             'local': {}
         }
+        self.constant_values = {}
+        self.free_temporals = {
+            't_int': [],
+            't_float': [],
+            't_bool': [],
+        }
 
     def assign(self, type, value=None):
         """
         Assign memory to a variable or constant.
 
+        Constants are pooled by type and value, so 1 and 1.0 get different addresses.
+
         Parameters:
         - type (str): The type of memory to assign.
         - value: The value to assign (if any).
         """
         if value is not None:
-            if value not in self.constant_table.keys():
-                self.constant_table[value] = self.counter_table['global'][type]
+            if (type, value) not in self.constant_table.keys():
+                self.constant_table[(type, value)] = self.counter_table['global'][type]
+                self.constant_values[self.counter_table['global'][type]] = value
             else:
-                return self.constant_table[value]
+                return self.constant_table[(type, value)]
+        elif type in self.free_temporals and self.free_temporals[type]:
+            return self.free_temporals[type].pop()
         
         assigned_address = self.counter_table['global'][type]
+        self._check_limit(type, assigned_address)
         self.counter_table['global'][type] += 1
 
         return assigned_address
+
+    def release(self, address):
+        """
+        Release a temporal so its address can be assigned again.
+
+        Addresses that are not temporals are ignored.
+
+        Parameters:
+        - address (int): The memory address.
+        """
+        for type, free in self.free_temporals.items():
+            if OFFSETS[type] <= address < LIMITS[type]:
+                if address not in free:
+                    free.append(address)
+                return
     
+    def stop_recycling(self):
+        """
+        Stop recycling temporals.
+
+        Released temporals are reused by the rest of the program, so once the
+        program is parsed every temporal assigned (by the optimizer) must be a
+        new address.
+        """
+        for free in self.free_temporals.values():
+            free.clear()
+
     def assign_local(self, function, type):
         """
         Assign memory to a local variable or constant.
@@ -80,9 +155,35 @@ class MemoryAssigner:
             }
         
         assigned_address = self.counter_table['local'][function][type]
+        self._check_limit(type, assigned_address)
         self.counter_table['local'][function][type] += 1
 
         return assigned_address
+
+    def _check_limit(self, type, address):
+        """
+        Check that an address is inside its memory segment.
+        """
+        if LIMITS[type] is not None and address >= LIMITS[type]:
+            raise MemoryOverflowError(f'Memory segment {type} is full ({LIMITS[type] - OFFSETS[type]} addresses)')
+
+    def is_constant(self, address):
+        """
+        Check if a memory address holds a constant.
+
+        Parameters:
+        - address (int): The memory address.
+        """
+        return address in self.constant_values
+
+    def constant(self, address):
+        """
+        Get the value of a constant.
+
+        Parameters:
+        - address (int): The memory address of the constant.
+        """
+        return self.constant_values[address]
     
     def output(self):
         """
@@ -106,7 +207,7 @@ class MemoryAssigner:
         constant_table, counter_table = self.output()
 
         print('Constant Table:')
-        for value, address in constant_table.items():
+        for (_, value), address in constant_table.items():
             print(f'{address}: {value}')
 
         print('\nGlobal Counter Table:')
@@ -124,17 +225,26 @@ class MemorySegment:
     """
     This class represents a dynamic memory segment in runtime.
     
+    With 'array' storage, int and float segments are backed by typed arrays
+    (64-bit integers and doubles) instead of lists of Python objects, their
+    unassigned slots hold zero and int values are limited to 64 bits.
+
     Attributes:
-    - memory (list): The memory segment.
-    - type (str): The type of memory segment [g_void, g_int, g_float, l_int, l_float, t_int, t_float, t_bool, c_int, c_float, c_string].
+    - memory (list | array): The memory segment.
+    - type (str): The type of memory segment [g_void, g_int, g_float, l_int, l_float, t_int, t_float, t_bool, c_int, c_float, c_string, c_bool].
+    - bound (int): The number of parameters bound to the segment.
     """
 
-    def __init__(self, type, size=0):
+    def __init__(self, type, size=0, storage='list'):
         if type not in OFFSETS.keys():
             raise ValueError(f'Invalid memory segment type: {type}')
 
-        self.memory = [None] * size
+        if storage == 'array' and type in TYPECODES:
+            self.memory = array(TYPECODES[type], [0]) * size
+        else:
+            self.memory = [None] * size
         self.type = type
+        self.bound = 0
 
     def access(self, address):
         """
@@ -159,6 +269,16 @@ class MemorySegment:
         """
         index = address - OFFSETS[self.type]
         self.memory[index] = value
+
+    def bind(self, value):
+        """
+        Assign a value to the slot of the next parameter.
+
+        Parameters:
+        - value: The value to assign.
+        """
+        self.memory[self.bound] = value
+        self.bound += 1
     
     def __str__(self):
         return f'{self.memory}'
@@ -171,9 +291,12 @@ class MemoryManager:
     """
     This class manages the memory allocation for variables, parameters and constants in the
     runtime process.
+
+    Attributes:
+    - storage (str): The storage of the memory segments [list, array].
     """
 
-    def __init__(self):
+    def __init__(self, storage='list'):
         self.descriptor = {
             'global': {
                 'g_void': 0,
@@ -185,31 +308,63 @@ class MemoryManager:
                 'c_int': 0,
                 'c_float': 0,
                 'c_string': 0,
+                'c_bool': 0,
             },
             'local': {}
         }
         self.memory = Stack('memory')
+        self.pending = Stack('pending')
+        self.storage = storage
 
     def allocate(self, type, size=0):
         """
         Allocate memory for a memory segment.
 
+        Local segments are allocated in the frame staged by allocate_local().
+
         Parameters:
-        - type (str): The type of memory segment [g_void, g_int, g_float, l_int, l_float, t_int, t_float, t_bool, c_int, c_float, c_string].
+        - type (str): The type of memory segment [g_void, g_int, g_float, l_int, l_float, t_int, t_float, t_bool, c_int, c_float, c_string, c_bool].
         - size (int): The size of the memory segment.
         """
         if not type.startswith('l'):
             if self.memory.size() == 0:
                 self.memory.push({})
-            self.memory.items()[0][type] = MemorySegment(type, size)
+            self.global_frame()[type] = MemorySegment(type, size, self.storage)
         else:
-            self.memory.items()[-1][type] = MemorySegment(type, size)
+            self.pending.peek()[type] = MemorySegment(type, size, self.storage)
 
     def allocate_local(self):
         """
         Allocate memory for a local memory segments.
+
+        The new frame is staged (parameters are bound into it) until
+        activate_local() makes it the current frame.
         """
-        self.memory.push({})
+        self.pending.push({})
+
+    def allocate_frame(self, function):
+        """
+        Allocate and stage the local memory segments of a function.
+
+        Parameters:
+        - function (int): The function address.
+        """
+        self.pending.push({
+            type: MemorySegment(type, size, self.storage) for type, size in self.descriptor['local'][function].items()
+        })
+
+    def activate_local(self):
+        """
+        Make the staged frame the current frame (function call).
+        """
+        self.memory.push(self.pending.pop())
+
+    def replace_local(self):
+        """
+        Make the staged frame the current frame in place of the one being executed (tail call).
+        """
+        self.memory.pop()
+        self.memory.push(self.pending.pop())
 
     def deallocate_local(self):
         """
@@ -217,6 +372,38 @@ class MemoryManager:
         """
         self.memory.pop()
 
+    def global_frame(self):
+        """
+        Get the global frame (global, temporal and constant segments) without copying the stack.
+        """
+        return self.memory.first()
+
+    def current_frame(self):
+        """
+        Get the frame of the function being executed without copying the stack.
+        """
+        return self.memory.peek()
+
+    def load(self, program):
+        """
+        Describe and allocate the memory of a compiled program and apply its constants.
+
+        Parameters:
+        - program (Program): The program read from an object file.
+        """
+        for type, size in program.descriptor['global'].items():
+            self.describe(type=type, size=size)
+
+        for function, table in program.descriptor['local'].items():
+            for type, size in table.items():
+                self.describe(type=type, size=size, function=function)
+
+        for type, size in self.descriptor['global'].items():
+            self.allocate(type, size)
+
+        for address, value in program.constants:
+            self.assign(address, value)
+
     def describe(self, type, size=0, function=None):
         """
         Describe a memory segment.
@@ -238,9 +425,9 @@ class MemoryManager:
         type = self._get_type(address)
 
         if type.startswith('l'):
-            value = self.memory.peek()[type].access(address) if self.memory.peek()[type].access(address) is not None else self.memory.peek(2)[type].access(address)
+            value = self.current_frame()[type].access(address)
         else:
-            value = self.memory.first()[type].access(address)
+            value = self.global_frame()[type].access(address)
 
         if type.endswith('void'):
             return None
@@ -266,9 +453,9 @@ class MemoryManager:
         type = self._get_type(address)
 
         if type.startswith('l'):
-            memory_to_access = self.memory.items()[-1]
+            memory_to_access = self.current_frame()
         else:
-            memory_to_access = self.memory.items()[0]
+            memory_to_access = self.global_frame()
 
         if type.endswith('int'):
             value = int(value)
@@ -281,34 +468,115 @@ class MemoryManager:
 
         memory_to_access[type].assign(address, value)
 
-    def param(self, address):
+    def param(self, address, target=-1):
         """
-        Copy a address value to a local memory segment.
+        Copy a address value to a local memory segment of the staged frame.
         
         Parameters:
         - address (int): The memory address.
+        - target (int): The parameter address in the staged frame, the next parameter slot when -1.
         """
         type = self._get_type(address)
         
         if type.startswith('l'):
-            access_memory = self.memory.items()[-2]
+            access_memory = self.current_frame()
         else:
-            access_memory = self.memory.items()[0]
+            access_memory = self.global_frame()
 
         value = access_memory[type].access(address)
 
-        index = 0
-        target_memory = self.memory.peek()
-
         if type.endswith('int'):
             target_type = 'l_int'
         if type.endswith('float'):
             target_type = 'l_float'
-        
-        while target_memory[target_type].access(OFFSETS[target_type] + index) is not None:
-            index += 1
 
-        target_memory[target_type].assign(OFFSETS[target_type] + index, value)
+        if target != -1:
+            self.pending.peek()[target_type].assign(target, value)
+        else:
+            self.pending.peek()[target_type].bind(value)
+
+    def bind(self, type, value):
+        """
+        Bind a parameter value to the next parameter slot of the staged frame.
+
+        Parameters:
+        - type (str): The local memory segment type [l_int, l_float].
+        - value: The value to bind.
+        """
+        self.pending.peek()[type].bind(value)
+
+    def resolve(self, address):
+        """
+        Resolve a memory address into its memory segment type and slot index.
+
+        Parameters:
+        - address (int): The memory address.
+
+        Returns:
+        - tuple: The memory segment type and the slot index.
+        """
+        type = self._get_type(address)
+        return type, address - OFFSETS[type]
+
+    def reader(self, address):
+        """
+        Build a function that reads a memory address.
+
+        The address is resolved once, so calling the function does no type
+        classification. Local addresses are read from the current frame.
+
+        Parameters:
+        - address (int): The memory address.
+
+        Returns:
+        - callable: A function without parameters returning the value.
+        """
+        type, index = self.resolve(address)
+
+        if type == 'g_void':
+            return lambda: None
+        if type.startswith('l'):
+            frames = self.memory.stack
+            return lambda: frames[-1][type].memory[index]
+        return partial(getitem, self.global_frame()[type].memory, index)
+
+    def writer(self, address, cast=True, staged=False):
+        """
+        Build a function that assigns a value to a memory address.
+
+        The address is resolved once, so calling the function does no type
+        classification. Local addresses are written to the current frame, or
+        to the staged frame when binding parameters.
+
+        Parameters:
+        - address (int): The memory address.
+        - cast (bool): Whether values have to be converted to the segment type.
+        - staged (bool): Whether local addresses belong to the staged frame.
+
+        Returns:
+        - callable: A function receiving the value to assign.
+        """
+        type, index = self.resolve(address)
+        convert = CASTS[type.split('_')[-1]]
+
+        if type.startswith('l'):
+            frames = self.pending.stack if staged else self.memory.stack
+
+            if cast:
+                def write(value):
+                    frames[-1][type].memory[index] = convert(value)
+            else:
+                def write(value):
+                    frames[-1][type].memory[index] = value
+            return write
+
+        memory = self.global_frame()[type].memory
+
+        if cast:
+            def write(value):
+                memory[index] = convert(value)
+            return write
+        return partial(setitem, memory, index)
 
     def _get_type(self, address):
         """
@@ -334,8 +602,250 @@ class MemoryManager:
             return 'c_string'
         elif address < OFFSETS['l_float']:
             return 'l_int'
-        else:
+        elif address < OFFSETS['c_bool']:
             return 'l_float'
+        else:
+            return 'c_bool'
         
     def __str__(self):
-        return str(self.memory)
\ No newline at end of file
+        return str(self.memory)
+
+class FlatMemoryManager(MemoryManager):
+    """
+    This class manages the runtime memory as a flat register file.
+
+    Global, temporal and constant segments share one static list, laid out
+    one after the other when the program is loaded, so every address is
+    rebased once into a single index. Locals live in a growable arena where
+    every frame is a slice starting at a base pointer. Frames share one
+    layout: int locals start at offset 0 and float locals at the largest
+    number of int locals of any function, so a local address has the same
+    offset in every function. Function calls only move the base pointer,
+    no Python object is allocated per call.
+
+    Attributes:
+    - static (list): The global, temporal and constant slots.
+    - bases (dict): The index of the first slot of every global segment in static.
+    - arena (list): The local slots of every frame.
+    - float_offset (int): The offset of the first float local in a frame.
+    - frame_sizes (dict): The frame size of every function by address.
+    - blank_frames (dict): The initial slots of the frame of every function by address.
+    - base_pointer (int): The index of the current frame in the arena.
+    - stack_pointer (int): The index of the first free slot of the arena.
+    - bases_stack (list): The base pointers of the callers of the current frame.
+    - staged (list): The base pointers of the staged frames.
+    - bound (dict): The next parameter slot of the staged frame by local segment type.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.static = []
+        self.bases = {}
+        self.arena = []
+        self.float_offset = 0
+        self.frame_sizes = {}
+        self.blank_frames = {}
+        self.base_pointer = 0
+        self.stack_pointer = 0
+        self.bases_stack = []
+        self.staged = []
+        self.bound = {}
+
+    def load(self, program):
+        """
+        Lay out the memory of a compiled program and apply its constants.
+
+        Parameters:
+        - program (Program): The program read from an object file.
+        """
+        for type, size in program.descriptor['global'].items():
+            self.describe(type=type, size=size)
+
+        for function, table in program.descriptor['local'].items():
+            for type, size in table.items():
+                self.describe(type=type, size=size, function=function)
+
+        size = 0
+        for type, segment_size in self.descriptor['global'].items():
+            self.bases[type] = size
+            size += segment_size
+        self.static = [None] * size
+
+        locals = self.descriptor['local'].values()
+        self.float_offset = max([table.get('l_int', 0) for table in locals], default=0)
+        for function, table in self.descriptor['local'].items():
+            self.frame_sizes[function] = self.float_offset + table.get('l_float', 0)
+            self.blank_frames[function] = [None] * self.frame_sizes[function]
+
+        for address, value in program.constants:
+            self.assign(address, value)
+
+    def slot(self, address):
+        """
+        Rebase a global, temporal or constant address into its index in static.
+        """
+        type, index = self.resolve(address)
+        return self.bases[type] + index
+
+    def offset(self, address):
+        """
+        Rebase a local address into its offset in a frame.
+        """
+        type, index = self.resolve(address)
+        return index if type == 'l_int' else self.float_offset + index
+
+    def allocate_frame(self, function):
+        """
+        Stage the frame of a function on top of the arena.
+
+        Parameters:
+        - function (int): The function address.
+        """
+        base = self.stack_pointer
+        end = base + self.frame_sizes[function]
+        if end > len(self.arena):
+            self.arena.extend([None] * max(end - len(self.arena), len(self.arena)))
+        self.arena[base:end] = self.blank_frames[function]
+        self.stack_pointer = end
+        self.staged.append(base)
+        self.bound = {'l_int': 0, 'l_float': 0}
+
+    def activate_local(self):
+        """
+        Make the staged frame the current frame (function call).
+        """
+        self.bases_stack.append(self.base_pointer)
+        self.base_pointer = self.staged.pop()
+
+    def replace_local(self):
+        """
+        Move the staged frame in place of the current frame (tail call).
+        """
+        base = self.staged.pop()
+        size = self.stack_pointer - base
+        self.arena[self.base_pointer:self.base_pointer + size] = self.arena[base:self.stack_pointer]
+        self.stack_pointer = self.base_pointer + size
+
+    def deallocate_local(self):
+        """
+        Release the current frame and return to the frame of the caller.
+        """
+        self.stack_pointer = self.base_pointer
+        self.base_pointer = self.bases_stack.pop()
+
+    def access(self, address):
+        """
+        Access a memory address.
+
+        Parameters:
+        - address (int): The memory address.
+        """
+        if self._get_type(address).startswith('l'):
+            return self.arena[self.base_pointer + self.offset(address)]
+        return self.static[self.slot(address)]
+
+    def assign(self, address, value):
+        """
+        Assign a value to a memory address.
+
+        Parameters:
+        - address (int): The memory address.
+        - value: The value to assign.
+        """
+        type = self._get_type(address)
+        value = CASTS[type.split('_')[-1]](value)
+
+        if type.startswith('l'):
+            self.arena[self.base_pointer + self.offset(address)] = value
+        else:
+            self.static[self.slot(address)] = value
+
+    def param(self, address, target=-1):
+        """
+        Copy a address value to a local slot of the staged frame.
+
+        Parameters:
+        - address (int): The memory address.
+        - target (int): The parameter address in the staged frame, the next parameter slot when -1.
+        """
+        value = self.access(address)
+        if target != -1:
+            self.arena[self.staged[-1] + self.offset(target)] = value
+        else:
+            self.bind('l_float' if self._get_type(address).endswith('float') else 'l_int', value)
+
+    def bind(self, type, value):
+        """
+        Bind a parameter value to the next parameter slot of the staged frame.
+
+        Parameters:
+        - type (str): The local memory segment type [l_int, l_float].
+        - value: The value to bind.
+        """
+        index = self.bound[type]
+        self.bound[type] += 1
+        self.arena[self.staged[-1] + self.offset(OFFSETS[type] + index)] = value
+
+    def reader(self, address):
+        """
+        Build a function that reads a memory address.
+
+        Parameters:
+        - address (int): The memory address.
+
+        Returns:
+        - callable: A function without parameters returning the value.
+        """
+        type = self._get_type(address)
+
+        if type == 'g_void':
+            return lambda: None
+        if type.startswith('l'):
+            arena = self.arena
+            offset = self.offset(address)
+            return lambda: arena[self.base_pointer + offset]
+        return partial(getitem, self.static, self.slot(address))
+
+    def writer(self, address, cast=True, staged=False):
+        """
+        Build a function that assigns a value to a memory address.
+
+        Parameters:
+        - address (int): The memory address.
+        - cast (bool): Whether values have to be converted to the segment type.
+        - staged (bool): Whether local addresses belong to the staged frame.
+
+        Returns:
+        - callable: A function receiving the value to assign.
+        """
+        type = self._get_type(address)
+        convert = CASTS[type.split('_')[-1]]
+
+        if type.startswith('l'):
+            arena = self.arena
+            offset = self.offset(address)
+
+            if staged:
+                frames = self.staged
+
+                def write(value):
+                    arena[frames[-1] + offset] = value
+            elif cast:
+                def write(value):
+                    arena[self.base_pointer + offset] = convert(value)
+            else:
+                def write(value):
+                    arena[self.base_pointer + offset] = value
+            return write
+
+        static = self.static
+        slot = self.slot(address)
+
+        if cast:
+            def write(value):
+                static[slot] = convert(value)
+            return write
+        return partial(setitem, static, slot)
+
+    def __str__(self):
+        return f'{self.static} {self.arena[:self.stack_pointer]}'
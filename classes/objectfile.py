@@ -0,0 +1,415 @@
+"""
+Object file module.
+
+This module contains the functions used to write and read compiled programs.
+Programs are stored in a versioned binary container made of a header and a
+list of typed sections:
+
+    header      magic, version, section count, crc32 of the sections
+    global      global memory descriptor (segment type, size)
+    local       memory descriptor of every function
+    constants   typed constant pool (address, tag, value), ints that don't
+                fit in 64 bits are stored as length-prefixed bytes
+    quadruples  packed fixed-width quadruple array
+
+The legacy hieroglyph-delimited text format is still supported.
+"""
+
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+
+from classes.memory import OFFSETS
+from classes.quadruples import QuadrupleList, QuadrupleBuffer
+from classes.exceptions import InvalidObjectFileError
+
+MAGIC = b'DUCK'
+VERSION = 1
+
+# Section kinds
+SECTION_GLOBAL = 1
+SECTION_LOCAL = 2
+SECTION_CONSTANTS = 3
+SECTION_QUADRUPLES = 4
+
+# Constant pool tags
+CONSTANT_INT = 1
+CONSTANT_FLOAT = 2
+CONSTANT_STRING = 3
+CONSTANT_BOOL = 4
+CONSTANT_BIG_INT = 5
+
+# Segment types are stored by their position in OFFSETS
+SEGMENT_TYPES = list(OFFSETS.keys())
+
+HEADER = struct.Struct('<4sHHI')
+SECTION = struct.Struct('<HHI')
+COUNT = struct.Struct('<I')
+DESCRIPTOR = struct.Struct('<BI')
+FUNCTION = struct.Struct('<iI')
+CONSTANT = struct.Struct('<iB')
+INT = struct.Struct('<q')
+FLOAT = struct.Struct('<d')
+QUADRUPLE = struct.Struct('<4i')
+
+INT_MIN = -(1 << 63)
+INT_MAX = (1 << 63) - 1
+
+# Text format separators
+TEXT_FUNCTION = '𓅭'
+TEXT_SECTION = '𓃻'
+TEXT_SEPARATOR = '𓃱'
+
+
+class Program:
+    """
+    This class represents a compiled program read from an object file.
+
+    Attributes:
+    - descriptor (dict): The memory descriptor {'global': {type: size}, 'local': {function: {type: size}}}.
+    - constants (list): The constant pool as (address, value) pairs.
+    - quadruples (QuadrupleList | QuadrupleBuffer): The quadruples of the program.
+    - mapping (mmap): The memory mapped object file (when loaded from a file).
+    """
+
+    def __init__(self, descriptor, constants, quadruples, mapping=None):
+        self.descriptor = descriptor
+        self.constants = constants
+        self.quadruples = quadruples
+        self.mapping = mapping
+
+    def close(self):
+        """
+        Release the memory mapped object file.
+        """
+        if isinstance(self.quadruples, QuadrupleBuffer):
+            self.quadruples.release()
+        if self.mapping is not None:
+            self.mapping.close()
+            self.mapping = None
+
+
+def dumps(counter_table, constant_table, quadruples, text=False):
+    """
+    Encode a compiled program.
+
+    Parameters:
+    - counter_table (dict): The memory descriptor produced by MemoryAssigner.output().
+    - constant_table (dict): The constant table produced by MemoryAssigner.output().
+    - quadruples (list): The list of quadruples.
+    - text (bool): Whether to use the legacy text format.
+
+    Returns:
+    - bytes: The encoded program.
+    """
+    if text:
+        return _dumps_text(counter_table, constant_table, quadruples).encode('utf-8')
+
+    sections = [
+        (SECTION_GLOBAL, _encode_descriptor(counter_table['global'])),
+        (SECTION_LOCAL, _encode_local(counter_table['local'])),
+        (SECTION_CONSTANTS, _encode_constants(constant_table)),
+        (SECTION_QUADRUPLES, _encode_quadruples(quadruples)),
+    ]
+
+    body = bytearray()
+    for kind, payload in sections:
+        # Pad payloads so every section starts 4-byte aligned
+        payload += b'\0' * (-len(payload) % 4)
+        body += SECTION.pack(kind, 0, len(payload))
+        body += payload
+
+    return HEADER.pack(MAGIC, VERSION, len(sections), zlib.crc32(body)) + bytes(body)
+
+
+def loads(data):
+    """
+    Decode a compiled program, the format is detected from its header.
+
+    The quadruples of binary programs are not copied, they are read from
+    the given buffer.
+
+    Parameters:
+    - data (bytes-like): The encoded program.
+
+    Returns:
+    - Program: The decoded program.
+
+    Raises:
+    - InvalidObjectFileError: If the data is not a valid program.
+    """
+    data = memoryview(data)
+
+    if data[:len(MAGIC)] != MAGIC:
+        try:
+            text = bytes(data).decode('utf-8')
+        except UnicodeDecodeError:
+            raise InvalidObjectFileError('Object file is neither binary nor text')
+        return _loads_text(text)
+
+    if len(data) < HEADER.size:
+        raise InvalidObjectFileError('Truncated object file header')
+
+    _, version, section_count, checksum = HEADER.unpack_from(data, 0)
+
+    if version != VERSION:
+        raise InvalidObjectFileError(f'Unsupported object file version: {version}')
+    if zlib.crc32(data[HEADER.size:]) != checksum:
+        raise InvalidObjectFileError('Object file checksum mismatch')
+
+    descriptor = {'global': {}, 'local': {}}
+    constants = []
+    quadruples = QuadrupleList()
+
+    offset = HEADER.size
+    for _ in range(section_count):
+        if offset + SECTION.size > len(data):
+            raise InvalidObjectFileError('Truncated object file section')
+
+        kind, _, length = SECTION.unpack_from(data, offset)
+        offset += SECTION.size
+
+        # A valid checksum over malformed sections still fails to decode
+        try:
+            if kind == SECTION_GLOBAL:
+                descriptor['global'] = _decode_descriptor(data, offset)[0]
+            elif kind == SECTION_LOCAL:
+                descriptor['local'] = _decode_local(data, offset)
+            elif kind == SECTION_CONSTANTS:
+                constants = _decode_constants(data, offset)
+            elif kind == SECTION_QUADRUPLES:
+                quadruples = _decode_quadruples(data, offset)
+            else:
+                raise InvalidObjectFileError(f'Unknown object file section: {kind}')
+        except (struct.error, IndexError, UnicodeDecodeError) as error:
+            raise InvalidObjectFileError(f'Malformed object file section {kind}: {error}')
+
+        offset += length
+
+    return Program(descriptor, constants, quadruples)
+
+
+def dump(path, counter_table, constant_table, quadruples, text=False):
+    """
+    Write a compiled program to a file.
+
+    Parameters:
+    - path (str): The output file path.
+    - counter_table (dict): The memory descriptor produced by MemoryAssigner.output().
+    - constant_table (dict): The constant table produced by MemoryAssigner.output().
+    - quadruples (list): The list of quadruples.
+    - text (bool): Whether to use the legacy text format.
+    """
+    with open(path, 'wb') as file:
+        file.write(dumps(counter_table, constant_table, quadruples, text))
+
+
+def load(path):
+    """
+    Read a compiled program from a file.
+
+    The file is memory mapped read-only, so processes loading the same
+    program share its pages. Call Program.close() to release the mapping.
+
+    Parameters:
+    - path (str): The object file path.
+
+    Returns:
+    - Program: The decoded program.
+    """
+    with open(path, 'rb') as file:
+        try:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise InvalidObjectFileError(f'Empty object file: {path}')
+
+    program = loads(mapping)
+    program.mapping = mapping
+    return program
+
+
+def _encode_descriptor(table):
+    payload = bytearray(COUNT.pack(len(table)))
+    for type, size in table.items():
+        payload += DESCRIPTOR.pack(SEGMENT_TYPES.index(type), size)
+    return payload
+
+
+def _decode_descriptor(data, offset):
+    table = {}
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    for _ in range(count):
+        type, size = DESCRIPTOR.unpack_from(data, offset)
+        table[SEGMENT_TYPES[type]] = size
+        offset += DESCRIPTOR.size
+    return table, offset
+
+
+def _encode_local(tables):
+    payload = bytearray(COUNT.pack(len(tables)))
+    for function, table in tables.items():
+        payload += FUNCTION.pack(function, 0)
+        payload += _encode_descriptor(table)
+    return payload
+
+
+def _decode_local(data, offset):
+    tables = {}
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    for _ in range(count):
+        function, _ = FUNCTION.unpack_from(data, offset)
+        tables[function], offset = _decode_descriptor(data, offset + FUNCTION.size)
+    return tables
+
+
+def _encode_constants(constant_table):
+    payload = bytearray(COUNT.pack(len(constant_table)))
+    for (_, value), address in constant_table.items():
+        if isinstance(value, bool):
+            payload += CONSTANT.pack(address, CONSTANT_BOOL) + INT.pack(value)
+        elif isinstance(value, str):
+            encoded = value.encode('utf-8')
+            payload += CONSTANT.pack(address, CONSTANT_STRING)
+            payload += COUNT.pack(len(encoded)) + encoded
+        elif isinstance(value, float):
+            payload += CONSTANT.pack(address, CONSTANT_FLOAT) + FLOAT.pack(value)
+        elif INT_MIN <= value <= INT_MAX:
+            payload += CONSTANT.pack(address, CONSTANT_INT) + INT.pack(value)
+        else:
+            encoded = value.to_bytes(value.bit_length() // 8 + 1, 'little', signed=True)
+            payload += CONSTANT.pack(address, CONSTANT_BIG_INT)
+            payload += COUNT.pack(len(encoded)) + encoded
+    return payload
+
+
+def _decode_constants(data, offset):
+    constants = []
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    for _ in range(count):
+        address, tag = CONSTANT.unpack_from(data, offset)
+        offset += CONSTANT.size
+        if tag == CONSTANT_STRING:
+            (length,) = COUNT.unpack_from(data, offset)
+            offset += COUNT.size
+            value = bytes(data[offset:offset + length]).decode('utf-8')
+            offset += length
+        elif tag == CONSTANT_FLOAT:
+            (value,) = FLOAT.unpack_from(data, offset)
+            offset += FLOAT.size
+        elif tag == CONSTANT_INT:
+            (value,) = INT.unpack_from(data, offset)
+            offset += INT.size
+        elif tag == CONSTANT_BIG_INT:
+            (length,) = COUNT.unpack_from(data, offset)
+            offset += COUNT.size
+            value = int.from_bytes(data[offset:offset + length], 'little', signed=True)
+            offset += length
+        elif tag == CONSTANT_BOOL:
+            (value,) = INT.unpack_from(data, offset)
+            value = bool(value)
+            offset += INT.size
+        else:
+            raise InvalidObjectFileError(f'Unknown constant tag: {tag}')
+        constants.append((address, value))
+    return constants
+
+
+def _encode_quadruples(quadruples):
+    payload = bytearray(COUNT.pack(len(quadruples)))
+    for q in quadruples:
+        payload += QUADRUPLE.pack(q.operator, q.left_operand, q.right_operand, q.result)
+    return payload
+
+
+def _decode_quadruples(data, offset):
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    end = offset + count * QUADRUPLE.size
+
+    if end > len(data):
+        raise InvalidObjectFileError('Truncated quadruple section')
+
+    if sys.byteorder == 'little' and array('i').itemsize == 4:
+        return QuadrupleBuffer(data[offset:end].cast('i'))
+
+    # Foreign layout, the quadruples have to be copied and converted
+    fields = array('i' if array('i').itemsize == 4 else 'l', bytes(data[offset:end]))
+    if sys.byteorder != 'little':
+        fields.byteswap()
+    return QuadrupleBuffer(fields)
+
+
+def _dumps_text(counter_table, constant_table, quadruples):
+    lines = []
+    for _, table in counter_table.items():
+        for t, c in table.items():
+            if type(c) == dict:
+                lines.append(TEXT_FUNCTION)
+                lines.append(f'{t}')
+                for t2, c2 in c.items():
+                    lines.append(f'{t2}{TEXT_SEPARATOR}{c2}')
+            else:
+                lines.append(f'{t}{TEXT_SEPARATOR}{c}')
+    lines.append(TEXT_SECTION)
+    for (_, value), address in constant_table.items():
+        lines.append(f'{address}{TEXT_SEPARATOR}{value}')
+    lines.append(TEXT_SECTION)
+    return '\n'.join(lines) + '\n' + '\n'.join([str(q) for q in quadruples])
+
+
+def _loads_text(text):
+    try:
+        return _parse_text(text)
+    except (StopIteration, ValueError) as error:
+        raise InvalidObjectFileError(f'Malformed text object file: {str(error) or "unexpected end of file"}')
+
+
+def _parse_text(text):
+    descriptor = {'global': {}, 'local': {}}
+    constants = []
+    quadruples = QuadrupleList()
+
+    lines = iter(text.split('\n'))
+    line = next(lines, '').strip()
+
+    # Global memory descriptor
+    while line != TEXT_FUNCTION and line != TEXT_SECTION:
+        type, size = line.split(TEXT_SEPARATOR)
+        descriptor['global'][type] = int(size)
+        line = next(lines).strip()
+
+    # Local memory descriptors
+    while line != TEXT_SECTION:
+        function = int(next(lines).strip())
+        descriptor['local'][function] = {}
+        line = next(lines).strip()
+
+        while line != TEXT_FUNCTION and line != TEXT_SECTION:
+            type, size = line.split(TEXT_SEPARATOR)
+            descriptor['local'][function][type] = int(size)
+            line = next(lines).strip()
+
+    # Constants
+    line = next(lines).strip()
+
+    while line != TEXT_SECTION:
+        address, value = line.split(TEXT_SEPARATOR, 1)
+        if int(address) >= OFFSETS['c_bool']:
+            value = value == 'True'
+        constants.append((int(address), value))
+        line = next(lines).strip()
+
+    # Quadruples
+    for line in lines:
+        line = line.strip()
+        if not line:
+            break
+        operator, left_operand, right_operand, result = line.split(' ')
+        quadruples.add(int(operator), int(left_operand), int(right_operand), int(result))
+
+    return Program(descriptor, constants, quadruples)
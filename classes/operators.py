@@ -2,6 +2,8 @@
 Module to manage operator numeric equivalence.
 """
 
+import operator
+
 OPERATORS_NUMERIC = {
     '-': 1,
     '+': 2,
@@ -22,4 +24,58 @@ OPERATORS_NUMERIC = {
     'ERA': 17,
     'ENDFUNC': 18,
     'PARAM': 19,
-}
\ No newline at end of file
+    'GOTOF<': 20,
+    'GOTOF>': 21,
+    'GOTOF<=': 22,
+    'GOTOF>=': 23,
+    'GOTOF==': 24,
+    'GOTOF!=': 25,
+    'GOTOT<': 26,
+    'GOTOT>': 27,
+    'GOTOT<=': 28,
+    'GOTOT>=': 29,
+    'GOTOT==': 30,
+    'GOTOT!=': 31,
+    'TAILSUB': 32,
+}
+
+# Operators that produce a bool
+RELATIONAL_OPERATORS = ('<', '>', '<=', '>=', '==', '!=')
+
+# Fused compare-and-branch operators, by the jump and relational operator they replace
+BRANCH_OPERATORS = {
+    OPERATORS_NUMERIC[f'{jump}{relational}']: (jump, relational)
+    for jump in ('GOTOF', 'GOTOT')
+    for relational in RELATIONAL_OPERATORS
+}
+
+# Operators whose result is the index of a quadruple
+JUMP_OPERATORS = {
+    OPERATORS_NUMERIC['GOTO'],
+    OPERATORS_NUMERIC['GOTOF'],
+    OPERATORS_NUMERIC['GOTOT'],
+    OPERATORS_NUMERIC['GOSUB'],
+    OPERATORS_NUMERIC['TAILSUB'],
+    *BRANCH_OPERATORS,
+}
+
+# Jump operators that may also fall through to the next quadruple
+CONDITIONAL_JUMP_OPERATORS = {
+    OPERATORS_NUMERIC['GOTOF'],
+    OPERATORS_NUMERIC['GOTOT'],
+    *BRANCH_OPERATORS,
+}
+
+# Python functions of the arithmetic and relational operators
+OPERATOR_FUNCTIONS = {
+    '-': operator.sub,
+    '+': operator.add,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
@@ -0,0 +1,760 @@
+"""
+Optimizer module.
+
+This module contains the optimization passes applied to the quadruples built
+by the parser, before the program is written. Passes rewrite the quadruple
+list in place and keep jump targets and function indexes consistent.
+"""
+
+import itertools
+
+from classes.cfg import ControlFlowGraph
+from classes.memory import OFFSETS, LIMITS
+from classes.quadruples import Quadruple
+from classes.operators import OPERATORS_NUMERIC, JUMP_OPERATORS, BRANCH_OPERATORS, CONDITIONAL_JUMP_OPERATORS
+
+GOTO = OPERATORS_NUMERIC['GOTO']
+GOTOF = OPERATORS_NUMERIC['GOTOF']
+GOTOT = OPERATORS_NUMERIC['GOTOT']
+ASSIGN = OPERATORS_NUMERIC['=']
+PRINT = OPERATORS_NUMERIC['PRINT']
+PARAM = OPERATORS_NUMERIC['PARAM']
+
+# Operators that store their value in the result address
+STORE_OPERATORS = {
+    OPERATORS_NUMERIC[operator]
+    for operator in ('-', '+', '*', '/', '<', '>', '<=', '>=', '==', '!=', '=')
+}
+
+# Segments whose values are only visible inside the function that writes them
+PRIVATE_SEGMENTS = ('t_int', 't_float', 't_bool', 'l_int', 'l_float')
+
+# Segments a called function can write
+SHARED_SEGMENTS = ('g_int', 'g_float', 't_int', 't_float', 't_bool')
+
+ERA = OPERATORS_NUMERIC['ERA']
+GOSUB = OPERATORS_NUMERIC['GOSUB']
+TAILSUB = OPERATORS_NUMERIC['TAILSUB']
+ENDFUNC = OPERATORS_NUMERIC['ENDFUNC']
+
+# Largest function body, in quadruples, copied into its callers
+INLINE_THRESHOLD = 16
+
+# Operators whose operands can be swapped
+COMMUTATIVE_OPERATORS = {OPERATORS_NUMERIC[operator] for operator in ('+', '*', '==', '!=')}
+
+
+def compact(quadruples, function_directory, removed):
+    """
+    Remove quadruples and renumber jump targets and function indexes.
+
+    A jump to a removed quadruple lands on the next one that is kept.
+
+    Parameters:
+    - quadruples (QuadrupleBuilder): The quadruples to rewrite.
+    - function_directory (SymbolTable): The function directory.
+    - removed (set): The indexes of the quadruples to remove.
+    """
+    new_index = []
+    kept = []
+    for i, quadruple in enumerate(quadruples.quadruples):
+        new_index.append(len(kept))
+        if i not in removed:
+            kept.append(quadruple)
+    new_index.append(len(kept))
+
+    for quadruple in kept:
+        if quadruple.operator in JUMP_OPERATORS and quadruple.result != -1:
+            quadruple.result = new_index[quadruple.result]
+
+    for symbol in function_directory.symbols.values():
+        if symbol.index is not None:
+            symbol.update_index(new_index[symbol.index])
+
+    quadruples.quadruples = kept
+
+
+def segment(address):
+    """
+    Get the memory segment of an address [g_int, t_float, l_int, ...].
+    """
+    for type in OFFSETS:
+        if OFFSETS[type] <= address and (LIMITS[type] is None or address < LIMITS[type]):
+            return type
+    return None
+
+
+def is_private(address):
+    """
+    Check if a memory address belongs to a temporal or local segment.
+    """
+    return segment(address) in PRIVATE_SEGMENTS
+
+
+def reads(quadruple):
+    """
+    Get the memory addresses read by a quadruple.
+
+    Parameters:
+    - quadruple (Quadruple): The quadruple.
+
+    Returns:
+    - list: The addresses read.
+    """
+    if (quadruple.operator in STORE_OPERATORS and quadruple.operator != ASSIGN) or quadruple.operator in BRANCH_OPERATORS:
+        return [quadruple.left_operand, quadruple.right_operand]
+    if quadruple.operator in (ASSIGN, PRINT, PARAM, GOTOF, GOTOT):
+        return [quadruple.left_operand]
+    return []
+
+
+def writes(quadruple):
+    """
+    Get the memory address written by a quadruple in the current frame.
+
+    Parameters:
+    - quadruple (Quadruple): The quadruple.
+
+    Returns:
+    - int: The address written or None.
+    """
+    if quadruple.operator in STORE_OPERATORS:
+        return quadruple.result
+    return None
+
+
+def liveness(graph):
+    """
+    Compute the temporals and locals live at the end of every block.
+
+    Temporals and locals are dead when a function returns or the program
+    ends, and a function call neither reads nor writes the ones of its caller.
+
+    Parameters:
+    - graph (ControlFlowGraph): The control flow graph.
+
+    Returns:
+    - dict: The set of live addresses at the end of every block by id.
+    """
+    used = {}
+    defined = {}
+    for id, block in graph.blocks.items():
+        used[id] = set()
+        defined[id] = set()
+        for quadruple in block.quadruples:
+            used[id].update(a for a in reads(quadruple) if is_private(a) and a not in defined[id])
+            if writes(quadruple) is not None:
+                defined[id].add(writes(quadruple))
+
+    live_in = {id: set() for id in graph.blocks}
+    live_out = {id: set() for id in graph.blocks}
+    changed = True
+    while changed:
+        changed = False
+        for id in reversed(list(graph.blocks)):
+            out = set()
+            for successor in graph.blocks[id].successors():
+                out |= live_in[successor]
+            live_out[id] = out
+            new = used[id] | (out - defined[id])
+            if new != live_in[id]:
+                live_in[id] = new
+                changed = True
+
+    return live_out
+
+
+def dead_code(quadruples, function_directory, memory_assigner):
+    """
+    Dead code elimination pass.
+
+    - Conditional jumps on constants become a GOTO or are removed.
+    - Blocks not reachable from the entry quadruple or from a called function are removed.
+    - Stores to temporals and locals that are not read before being overwritten are removed.
+
+    Parameters:
+    - quadruples (QuadrupleBuilder): The quadruples to rewrite.
+    - function_directory (SymbolTable): The function directory.
+    - memory_assigner (MemoryAssigner): The memory assigner of the program.
+    """
+    graph = ControlFlowGraph(quadruples.quadruples, function_directory)
+    constants = memory_assigner.constant_values
+
+    for block in graph.blocks.values():
+        last = block.terminator()
+        if last is None or last.operator not in (GOTOF, GOTOT) or last.left_operand not in constants:
+            continue
+
+        if bool(constants[last.left_operand]) == (last.operator == GOTOT):
+            last.operator = GOTO
+            last.left_operand = -1
+            block.fallthrough = None
+        else:
+            block.quadruples.pop()
+            block.jump = None
+
+    reachable = set(graph.reachable([graph.entry], calls=True))
+    for id in list(graph.blocks):
+        if id not in reachable and id != graph.exit:
+            graph.remove_block(id)
+
+    for name, symbol in function_directory.symbols.items():
+        if symbol.index is not None and name not in graph.functions:
+            symbol.update_index(None)
+
+    graph.update_predecessors()
+
+    changed = True
+    while changed:
+        changed = False
+        live_out = liveness(graph)
+        for id, block in graph.blocks.items():
+            live = set(live_out[id])
+            kept = []
+            for quadruple in reversed(block.quadruples):
+                written = writes(quadruple)
+                if written is not None and is_private(written) and written not in live:
+                    changed = True
+                    continue
+                if written is not None:
+                    live.discard(written)
+                live.update(a for a in reads(quadruple) if is_private(a))
+                kept.append(quadruple)
+            block.quadruples = kept[::-1]
+
+    quadruples.quadruples = graph.linearize()
+
+
+def rename(quadruples, start, address, new):
+    """
+    Rename the reads of an address up to its next store.
+
+    Parameters:
+    - quadruples (list): The quadruples of a block.
+    - start (int): The index of the first quadruple to rename.
+    - address (int): The address to rename.
+    - new (int): The new address.
+
+    Returns:
+    - bool: Whether the address is stored again in the block.
+    """
+    for quadruple in quadruples[start:]:
+        if address in reads(quadruple):
+            if quadruple.left_operand == address:
+                quadruple.left_operand = new
+            if quadruple.right_operand == address:
+                quadruple.right_operand = new
+        if writes(quadruple) == address:
+            return True
+    return False
+
+
+def stored_again(quadruples, start, address):
+    """
+    Check if an address is stored again in a block.
+    """
+    return any(writes(quadruple) == address for quadruple in quadruples[start:])
+
+
+def common_subexpressions(quadruples, function_directory, memory_assigner):
+    """
+    Local common subexpression elimination pass.
+
+    Every block is value numbered: operations with the same operator and
+    the same operand values (in any order for commutative operators) get
+    the same number, so an operation already computed in the block is
+    replaced by the temporal that holds its value. Since temporals are
+    reused, the first computation is moved to a new temporal when its value
+    has to survive longer.
+
+    Parameters:
+    - quadruples (QuadrupleBuilder): The quadruples to rewrite.
+    - function_directory (SymbolTable): The function directory.
+    - memory_assigner (MemoryAssigner): The memory assigner of the program.
+    """
+    graph = ControlFlowGraph(quadruples.quadruples, function_directory)
+    live_out = liveness(graph)
+    numbers = itertools.count()
+
+    for id, block in graph.blocks.items():
+        program = block.quadruples
+        value_numbers = {}
+        expressions = {}
+        # The temporals written once in the block, that always hold their value
+        kept = set()
+
+        def number(address):
+            if address not in value_numbers:
+                value_numbers[address] = next(numbers)
+            return value_numbers[address]
+
+        i = 0
+        while i < len(program):
+            quadruple = program[i]
+            result = writes(quadruple)
+            i += 1
+
+            if result is None:
+                continue
+            if quadruple.operator == ASSIGN:
+                same_type = segment(quadruple.left_operand).split('_')[-1] == segment(result).split('_')[-1]
+                value_numbers[result] = number(quadruple.left_operand) if same_type else next(numbers)
+                continue
+
+            operands = (number(quadruple.left_operand), number(quadruple.right_operand))
+            if quadruple.operator in COMMUTATIVE_OPERATORS:
+                operands = tuple(sorted(operands))
+            key = (quadruple.operator,) + operands
+
+            if key not in expressions:
+                value_numbers[result] = next(numbers)
+                expressions[key] = [value_numbers[result], quadruple]
+                continue
+
+            value, first = expressions[key]
+            holder = first.result
+
+            # The first computation moves to a new temporal unless it already has one
+            if holder not in kept:
+                start = program.index(first) + 1
+                if not stored_again(program, start, holder) and holder in live_out[id]:
+                    value_numbers[result] = next(numbers)
+                    continue
+                holder = memory_assigner.assign(segment(first.result))
+                rename(program, start, first.result, holder)
+                first.result = holder
+                value_numbers[holder] = value
+                kept.add(holder)
+
+            if is_private(result) and (stored_again(program, i, result) or result not in live_out[id]):
+                rename(program, i, result, holder)
+                i -= 1
+                del program[i]
+            else:
+                quadruple.operator = ASSIGN
+                quadruple.left_operand = holder
+                quadruple.right_operand = -1
+                value_numbers[result] = value
+
+    quadruples.quadruples = graph.linearize()
+
+
+def owners(graph):
+    """
+    Get the function every block belongs to.
+
+    Parameters:
+    - graph (ControlFlowGraph): The control flow graph.
+
+    Returns:
+    - dict: The name of the function of every reachable block by id, None for main.
+    """
+    owner = {id: None for id in graph.reachable([graph.entry])}
+    for name, entry in graph.functions.items():
+        for id in graph.reachable([entry]):
+            owner[id] = name
+    return owner
+
+
+def callees(graph, owner):
+    """
+    Get the functions every function calls, directly or not.
+
+    Parameters:
+    - graph (ControlFlowGraph): The control flow graph.
+    - owner (dict): The function of every block, computed by owners().
+
+    Returns:
+    - dict: The set of the names of the functions reachable from every function by name.
+    """
+    names = {entry: name for name, entry in graph.functions.items()}
+    calls = {}
+    for id, name in owner.items():
+        block = graph.blocks[id]
+        if block.call is not None:
+            calls.setdefault(name, set()).add(names.get(block.call))
+
+    reachable = {}
+    for name in set(owner.values()):
+        visited = set()
+        pending = list(calls.get(name, ()))
+        while pending:
+            callee = pending.pop()
+            if callee not in visited:
+                visited.add(callee)
+                pending.extend(calls.get(callee, ()))
+        reachable[name] = visited
+    return reachable
+
+
+def add_preheader(graph, loop):
+    """
+    Add an empty block that runs once before a loop.
+
+    Every edge that enters the loop header from outside the loop is moved
+    to the new block, which falls through to the header.
+
+    Parameters:
+    - graph (ControlFlowGraph): The control flow graph.
+    - loop (Loop): The loop.
+
+    Returns:
+    - BasicBlock: The preheader.
+    """
+    header = loop.header
+    preheader = graph.new_block(before=header)
+    preheader.fallthrough = header
+
+    for id, block in graph.blocks.items():
+        if id in loop.blocks or id == preheader.id:
+            continue
+        if block.jump == header:
+            block.jump = preheader.id
+        if block.fallthrough == header:
+            block.fallthrough = preheader.id
+        if block.call == header:
+            block.call = preheader.id
+
+    graph.functions = {name: preheader.id if entry == header else entry for name, entry in graph.functions.items()}
+    graph.update_predecessors()
+    return preheader
+
+
+def hoist(graph, loop, dominators, live_out, shared, memory_assigner):
+    """
+    Move the loop-invariant quadruples of a loop to its preheader.
+
+    A quadruple is invariant when it stores into a temporal and its operands
+    are constants, addresses the loop never writes or temporals already
+    hoisted. Only quadruples in blocks that run on every iteration (blocks
+    that dominate every exit of the loop) are moved, so an operation that
+    can fail, like a division, never runs when the loop would not have run
+    it. Loops without exits are left alone, no block of theirs is known to
+    run on every iteration. Every hoisted value gets a new temporal, since
+    temporals are reused.
+
+    Parameters:
+    - graph (ControlFlowGraph): The control flow graph.
+    - loop (Loop): The loop.
+    - dominators (dict): The dominators of every block.
+    - live_out (dict): The live temporals and locals at the end of every block.
+    - shared (bool): Whether the loop calls functions, which can write globals and temporals.
+    - memory_assigner (MemoryAssigner): The memory assigner, to get new temporals.
+
+    Returns:
+    - bool: Whether any quadruple was hoisted.
+    """
+    exits = [id for id in loop.blocks if any(s not in loop.blocks for s in graph.blocks[id].successors())]
+    if not exits:
+        return False
+
+    written = set()
+    for id in loop.blocks:
+        for quadruple in graph.blocks[id].quadruples:
+            if writes(quadruple) is not None:
+                written.add(writes(quadruple))
+
+    hoisted = []
+    renamed = set()
+
+    def invariant(address):
+        if address in renamed or memory_assigner.is_constant(address):
+            return True
+        return address not in written and not (shared and segment(address) in SHARED_SEGMENTS)
+
+    for id in [id for id in graph.blocks if id in loop.blocks]:
+        if not all(id in dominators[exit] for exit in exits):
+            continue
+
+        block = graph.blocks[id]
+        i = 0
+        while i < len(block.quadruples):
+            quadruple = block.quadruples[i]
+            result = writes(quadruple)
+            i += 1
+
+            if (
+                result is None
+                or quadruple.operator == ASSIGN
+                or not segment(result).startswith('t_')
+                or not all(invariant(address) for address in reads(quadruple))
+            ):
+                continue
+
+            # The temporal is renamed up to its next store, it can't be read after it
+            uses = []
+            redefined = False
+            for later in block.quadruples[i:]:
+                uses.append(later)
+                if writes(later) == result:
+                    redefined = True
+                    break
+            if not redefined and result in live_out[id]:
+                continue
+
+            temporal = memory_assigner.assign(segment(result))
+            for later in uses:
+                if later.left_operand == result and result in reads(later):
+                    later.left_operand = temporal
+                if later.right_operand == result and result in reads(later):
+                    later.right_operand = temporal
+
+            quadruple.result = temporal
+            renamed.add(temporal)
+            hoisted.append(quadruple)
+            i -= 1
+            del block.quadruples[i]
+
+    if hoisted:
+        add_preheader(graph, loop).quadruples.extend(hoisted)
+    return bool(hoisted)
+
+
+def expand_call(graph, block, function, slots):
+    """
+    Replace a function call with a copy of the body of the function.
+
+    The ERA quadruple is removed, PARAM quadruples become assignments to
+    the slots of the parameters, the GOSUB quadruple is replaced by the
+    copied blocks and ENDFUNC falls through to the return point.
+
+    Parameters:
+    - graph (ControlFlowGraph): The control flow graph.
+    - block (BasicBlock): The block that ends with the call.
+    - function (Symbol): The function called.
+    - slots (callable): Get the caller address of a local of the function.
+    """
+    def copy(quadruple):
+        left_operand, right_operand, result = quadruple.left_operand, quadruple.right_operand, quadruple.result
+        read = reads(quadruple)
+        if left_operand in read and segment(left_operand).startswith('l_'):
+            left_operand = slots(left_operand)
+        if right_operand in read and segment(right_operand).startswith('l_'):
+            right_operand = slots(right_operand)
+        if writes(quadruple) is not None and segment(result).startswith('l_'):
+            result = slots(result)
+        return Quadruple(quadruple.operator, left_operand, right_operand, result)
+
+    program = block.quadruples
+    era = max(i for i, quadruple in enumerate(program) if quadruple.operator == ERA and quadruple.result == function.address)
+    for quadruple in program[era + 1:-1]:
+        if quadruple.operator == PARAM:
+            quadruple.operator = ASSIGN
+            quadruple.result = slots(quadruple.result)
+    del program[-1]
+    del program[era]
+
+    returns = block.fallthrough
+    following = list(graph.blocks)[list(graph.blocks).index(block.id) + 1]
+    body = graph.reachable([graph.functions[function.name]])
+
+    copies = {}
+    for id in body:
+        copies[id] = graph.new_block([copy(quadruple) for quadruple in graph.blocks[id].quadruples], before=following)
+
+    for id in body:
+        original = graph.blocks[id]
+        clone = copies[id]
+        clone.jump = copies[original.jump].id if original.jump is not None else None
+        clone.fallthrough = copies[original.fallthrough].id if original.fallthrough is not None else None
+        clone.call = original.call
+        if clone.terminator() is not None and clone.terminator().operator == ENDFUNC:
+            del clone.quadruples[-1]
+            clone.fallthrough = returns
+
+    block.call = None
+    block.fallthrough = copies[body[0]].id
+    graph.update_predecessors()
+
+
+def inline(quadruples, function_directory, memory_assigner, threshold=INLINE_THRESHOLD):
+    """
+    Inline expansion pass.
+
+    Calls to functions that never call themselves, directly or not, and
+    whose body is at most threshold quadruples long are replaced with a
+    copy of the body. The locals of the function get new locals of the
+    caller, or new globals when the caller is main.
+
+    Parameters:
+    - quadruples (QuadrupleBuilder): The quadruples to rewrite.
+    - function_directory (SymbolTable): The function directory.
+    - memory_assigner (MemoryAssigner): The memory assigner of the program.
+    - threshold (int): The largest body, in quadruples, that is inlined.
+    """
+    graph = ControlFlowGraph(quadruples.quadruples, function_directory)
+
+    changed = True
+    while changed:
+        changed = False
+        owner = owners(graph)
+        reachable = callees(graph, owner)
+        names = {entry: name for name, entry in graph.functions.items()}
+
+        for id, block in graph.blocks.items():
+            if block.call is None or block.terminator().operator != GOSUB or id not in owner:
+                continue
+
+            name = names[block.call]
+            body = graph.reachable([block.call])
+            size = sum(len(graph.blocks[b].quadruples) for b in body) - 1
+            if name in reachable[name] or size > threshold:
+                continue
+
+            caller = owner[id]
+            slots = {}
+
+            def slot(address):
+                if address not in slots:
+                    type = segment(address)
+                    if caller is None:
+                        slots[address] = memory_assigner.assign(f'g_{type[2:]}')
+                    else:
+                        slots[address] = memory_assigner.assign_local(function_directory.lookup(caller).address, type)
+                return slots[address]
+
+            expand_call(graph, block, function_directory.lookup(name), slot)
+            changed = True
+            break
+
+    quadruples.quadruples = graph.linearize()
+
+
+def loop_invariants(quadruples, function_directory, memory_assigner):
+    """
+    Loop-invariant code motion pass.
+
+    Invariant quadruples of every natural loop are moved to a preheader that
+    runs once before the loop. Loops are revisited until nothing moves, so
+    invariants of nested loops climb to the outermost loop they belong to.
+
+    Loops that call functions treat globals and temporals as written by the
+    call, and are skipped when the call can reach the function of the loop
+    again, since the recursive call would overwrite the hoisted temporals.
+
+    Parameters:
+    - quadruples (QuadrupleBuilder): The quadruples to rewrite.
+    - function_directory (SymbolTable): The function directory.
+    - memory_assigner (MemoryAssigner): The memory assigner of the program.
+    """
+    graph = ControlFlowGraph(quadruples.quadruples, function_directory)
+
+    changed = True
+    while changed:
+        changed = False
+        dominators = graph.dominators()
+        live_out = liveness(graph)
+        owner = owners(graph)
+        reachable = callees(graph, owner)
+
+        for loop in graph.natural_loops(dominators):
+            shared = any(graph.blocks[id].call is not None for id in loop.blocks)
+            function = owner[loop.header]
+            if shared and function is not None and function in reachable[function]:
+                continue
+
+            if hoist(graph, loop, dominators, live_out, shared, memory_assigner):
+                changed = True
+                break
+
+    quadruples.quadruples = graph.linearize()
+
+
+def peephole(quadruples, function_directory, memory_assigner):
+    """
+    Peephole optimization pass.
+
+    - Jumps to a GOTO are threaded to its final target.
+    - Jumps to the next quadruple are removed.
+    - Self-assignments are removed.
+
+    Parameters:
+    - quadruples (QuadrupleBuilder): The quadruples to rewrite.
+    - function_directory (SymbolTable): The function directory.
+    - memory_assigner (MemoryAssigner): The memory assigner of the program.
+    """
+    program = quadruples.quadruples
+
+    for quadruple in program:
+        if quadruple.operator == GOTO or quadruple.operator in CONDITIONAL_JUMP_OPERATORS:
+            target = quadruple.result
+            visited = set()
+            while target < len(program) and program[target].operator == GOTO and target not in visited:
+                visited.add(target)
+                target = program[target].result
+            quadruple.result = target
+
+    while True:
+        program = quadruples.quadruples
+        removed = set()
+
+        for i, quadruple in enumerate(program):
+            if (quadruple.operator == GOTO or quadruple.operator in CONDITIONAL_JUMP_OPERATORS) and quadruple.result == i + 1:
+                removed.add(i)
+            elif quadruple.operator == ASSIGN and quadruple.left_operand == quadruple.result:
+                removed.add(i)
+
+        if not removed:
+            break
+
+        compact(quadruples, function_directory, removed)
+
+
+def tail_calls(quadruples, function_directory, memory_assigner):
+    """
+    Tail call pass.
+
+    A GOSUB followed by the ENDFUNC of the function it is in (directly or
+    through GOTOs) becomes a TAILSUB, which runs the called function in
+    place of the current frame and without a return address, so the
+    called function returns straight to the caller of the current one.
+
+    Parameters:
+    - quadruples (QuadrupleBuilder): The quadruples to rewrite.
+    - function_directory (SymbolTable): The function directory.
+    - memory_assigner (MemoryAssigner): The memory assigner of the program.
+    """
+    program = quadruples.quadruples
+
+    for i, quadruple in enumerate(program):
+        if quadruple.operator != GOSUB:
+            continue
+
+        following = i + 1
+        visited = set()
+        while following < len(program) and program[following].operator == GOTO and following not in visited:
+            visited.add(following)
+            following = program[following].result
+
+        if following < len(program) and program[following].operator == ENDFUNC:
+            quadruple.operator = TAILSUB
+
+
+# Optimization passes, in the order they run
+PASSES = {
+    'inline': inline,
+    'dead_code': dead_code,
+    'common_subexpressions': common_subexpressions,
+    'loop_invariants': loop_invariants,
+    'peephole': peephole,
+    'tail_calls': tail_calls,
+}
+
+
+def optimize(quadruples, function_directory, passes, memory_assigner, options=None):
+    """
+    Run optimization passes over the quadruples.
+
+    Parameters:
+    - quadruples (QuadrupleBuilder): The quadruples to rewrite.
+    - function_directory (SymbolTable): The function directory.
+    - passes (list): The names of the passes to run, they run in the order of PASSES.
+    - memory_assigner (MemoryAssigner): The memory assigner of the program.
+    - options (dict): The keyword arguments of every pass by name {'inline': {'threshold': 16}}.
+    """
+    memory_assigner.stop_recycling()
+    options = options or {}
+
+    for name, optimization in PASSES.items():
+        if name in passes:
+            optimization(quadruples, function_directory, memory_assigner, **options.get(name, {}))
@@ -128,10 +128,67 @@ class QuadrupleList:
         """
         return self.quadruples[index]
 
+    def __len__(self):
+        return len(self.quadruples)
+
+    def __getitem__(self, index):
+        return self.quadruples[index]
+
     def __str__(self):
         return '\n'.join([str(q) for q in self.quadruples])
     
     def __repr__(self):
         return str(self)
 
+
+class QuadrupleBuffer:
+    """
+    Quadruple buffer class for reading packed quadruples in runtime.
+
+    The quadruples are read straight from a flat buffer of 32-bit integers
+    (operator, left operand, right operand and result for every quadruple),
+    usually a memory mapped object file, so no object is built per quadruple
+    until it is requested.
+
+    Attributes:
+    - fields (memoryview): The flat integer view over the packed quadruples.
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def get(self, index):
+        """
+        Get a quadruple by index.
+
+        Parameters:
+        - index (int): The index of the quadruple.
+
+        Returns:
+        - Quadruple: The quadruple at the index.
+        """
+        fields = self.fields
+        start = index * 4
+        return Quadruple(fields[start], fields[start + 1], fields[start + 2], fields[start + 3])
+
+    def release(self):
+        """
+        Release the underlying buffer.
+        """
+        if isinstance(self.fields, memoryview):
+            self.fields.release()
+
+    def __len__(self):
+        return len(self.fields) // 4
+
+    def __getitem__(self, index):
+        if index < 0 or index >= len(self):
+            raise IndexError('quadruple index out of range')
+        return self.get(index)
+
+    def __str__(self):
+        return '\n'.join([str(self.get(i)) for i in range(len(self))])
+
+    def __repr__(self):
+        return str(self)
     
\ No newline at end of file
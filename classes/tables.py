@@ -0,0 +1,185 @@
+"""
+Lexer and parser tables module.
+
+This module builds the PLY lexer and parser from cached tables. Building
+them from the rules means validating every rule, compiling the token
+regular expressions and generating the LALR tables, which costs more than
+compiling a short program. The tables are written once to the tables
+directory, named after a fingerprint of the rules they come from, and read
+back on the next start. Changing a token, a regular expression or a grammar
+production changes the fingerprint, so the tables are generated again and
+the old ones removed.
+
+The parser tables are pickled, they load faster than a Python table module
+when bytecode isn't cached. Tables are written to a temporary file first and
+renamed into place, so processes starting at the same time never read a
+partial file.
+"""
+
+import os
+import hashlib
+import importlib.util
+
+import ply
+import ply.lex as lex
+import ply.yacc as yacc
+
+# Directory of the cached tables
+TABLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tables')
+
+
+def fingerprint(*parts):
+    """
+    Hash the parts of a specification, and the PLY version, into a short name.
+
+    Returns:
+    - str: The first 16 hex digits of the SHA-256 of the parts.
+    """
+    return hashlib.sha256(repr((ply.__version__, *parts)).encode()).hexdigest()[:16]
+
+
+def lexer_fingerprint(module):
+    """
+    Get the fingerprint of the token rules of a lexer module.
+
+    Only what goes into the tables counts: the token names, the literals, the
+    states and the regular expression of every rule (the value of string
+    rules, the docstring of function rules).
+    """
+    rules = [
+        (name, value if isinstance(value, str) else value.__doc__)
+        for name, value in vars(module).items() if name.startswith('t_')
+    ]
+    return fingerprint(
+        list(module.tokens),
+        getattr(module, 'literals', ''),
+        getattr(module, 'states', ()),
+        rules,
+    )
+
+
+def parser_fingerprint(module):
+    """
+    Get the fingerprint of the grammar of a parser module.
+
+    Only what goes into the tables counts: the tokens, the precedence, the
+    start symbol and the productions of every rule, in declaration order.
+    """
+    productions = [
+        (name, value.__doc__)
+        for name, value in vars(module).items()
+        if name.startswith('p_') and name != 'p_error' and callable(value)
+    ]
+    return fingerprint(
+        list(module.tokens),
+        getattr(module, 'precedence', ()),
+        getattr(module, 'start', None),
+        productions,
+    )
+
+
+def staging():
+    """
+    Create a temporary directory, next to the tables, to generate tables into.
+
+    The modules used to generate tables are imported here and not at the top
+    of the module, reading cached tables never needs them.
+
+    Returns:
+    - TemporaryDirectory: The directory, a context manager.
+    """
+    import tempfile
+
+    os.makedirs(TABLES_DIR, exist_ok=True)
+    return tempfile.TemporaryDirectory(dir=TABLES_DIR)
+
+
+def replace(source, destination):
+    """
+    Move a generated table file into place and remove the tables of the same kind it supersedes.
+
+    Parameters:
+    - source (str): The generated file.
+    - destination (str): The path of the table file, named kind_fingerprint.extension.
+    """
+    os.replace(source, destination)
+
+    kind = os.path.basename(destination).split('_')[0] + '_'
+    extension = os.path.splitext(destination)[1]
+    for name in os.listdir(TABLES_DIR):
+        path = os.path.join(TABLES_DIR, name)
+        if name.startswith(kind) and name.endswith(extension) and path != destination:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def build_lexer(module):
+    """
+    Build a lexer in optimized mode from its cached tables, generating them when missing.
+
+    Parameters:
+    - module (module): The module with the token rules.
+
+    Returns:
+    - Lexer: The lexer.
+    """
+    name = f'lextab_{lexer_fingerprint(module)}'
+    path = os.path.join(TABLES_DIR, f'{name}.py')
+
+    if os.path.exists(path):
+        spec = importlib.util.spec_from_file_location(name, path)
+        table = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(table)
+        return lex.lex(module=module, optimize=True, lextab=table)
+
+    # Validate the rules, optimized mode trusts them
+    lexer = lex.lex(module=module)
+
+    try:
+        with staging() as directory:
+            lex.lex(module=module, optimize=True, lextab=name, outputdir=directory)
+            replace(os.path.join(directory, f'{name}.py'), path)
+    except OSError:
+        # A read-only install still works, it just builds the tables every time
+        pass
+
+    return lexer
+
+
+def build_parser(module, debug=False):
+    """
+    Build an LALR parser from its cached tables, generating them when missing.
+
+    Parameters:
+    - module (module): The module with the grammar rules.
+    - debug (bool): Whether to generate the tables again and write the grammar, states and conflicts to parser.out in the tables directory.
+
+    Returns:
+    - LRParser: The parser.
+    """
+    name = f'parsetab_{parser_fingerprint(module)}'
+    path = os.path.join(TABLES_DIR, f'{name}.pickle')
+
+    if os.path.exists(path) and not debug:
+        return yacc.yacc(module=module, debug=False, picklefile=path, write_tables=False)
+
+    try:
+        with staging() as directory:
+            temporary = os.path.join(directory, f'{name}.pickle')
+            # The table module is never read or written: the tables are pickled
+            parser = yacc.yacc(
+                module=module,
+                debug=debug,
+                tabmodule=f'{name}_unused',
+                write_tables=False,
+                picklefile=temporary,
+                outputdir=TABLES_DIR,
+            )
+            replace(temporary, path)
+    except OSError:
+        # A read-only install still works, it just builds the tables every time
+        parser = yacc.yacc(module=module, debug=False, tabmodule=f'{name}_unused', write_tables=False)
+
+    return parser
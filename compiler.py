@@ -1,25 +1,239 @@
+import os
 import sys
-from x_parser import parse
+import glob
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from classes import objectfile
+from classes.cache import CompileCache, CACHE_DIR, CACHE_SIZE
+from classes.cfg import ControlFlowGraph
+from classes.context import CompilationContext
+from classes.optimizer import PASSES, INLINE_THRESHOLD
+
+SOURCE_EXTENSION = '.duck'
+
+
+def compile_file(source, output, passes=(), options=None, text=False, cfg=None, lexer='ply', cache=None):
+    """
+    Compile a source file into an object file.
+
+    Parameters:
+    - source (str): The path of the source file.
+    - output (str): The path of the object file, its directory is created if needed.
+    - passes (list): The names of the optimization passes to run.
+    - options (dict): The keyword arguments of every optimization pass by name.
+    - text (bool): Whether to write the legacy text object format.
+    - cfg (str): The format of the control flow graph to write next to the object file [dot, json], or None.
+    - lexer (str): The lexer [ply, scanner], the scanner streams the source instead of reading it whole.
+    - cache (CompileCache): The cache to look the object file up in and store it to, or None.
+
+    Returns:
+    - bool: Whether the object file came from the cache.
+    """
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+
+    # Sources are read in text mode, newlines translated, with and without the cache
+    with open(source, 'r') as file:
+        if cache is not None:
+            # The passes run in the order of PASSES and only the options of the ones that run matter
+            passes = [name for name in PASSES if name in passes]
+            options = {name: value for name, value in (options or {}).items() if name in passes}
+            key = cache.key(file, {'passes': passes, 'options': options, 'text': text, 'lexer': lexer})
+
+            # The control flow graph needs the parse, only object files are cached
+            data = None if cfg else cache.get(key)
+            if data is not None:
+                with open(output, 'wb') as object_file:
+                    object_file.write(data)
+                return True
+            file.seek(0)
+
+        # The parser is only imported on a miss, loading it costs more than a hit
+        import x_parser
+        from x_scanner import Scanner
+
+        context = CompilationContext()
+        if lexer == 'scanner':
+            counter_table, constant_table, quadruples = x_parser.parse(file, passes, options, context, Scanner())
+        else:
+            counter_table, constant_table, quadruples = x_parser.parse(file.read(), passes, options, context)
+
+    data = objectfile.dumps(counter_table, constant_table, quadruples.quadruples, text=text)
+    with open(output, 'wb') as file:
+        file.write(data)
+    if cache is not None:
+        try:
+            cache.put(key, data)
+        except OSError as error:
+            # The object file is written, a cache that can't store it only costs the next compile
+            print(f'Could not cache {source}: {error}', file=sys.stderr)
+
+    if cfg:
+        graph = ControlFlowGraph(quadruples.quadruples, context.function_directory)
+        with open(f'{os.path.splitext(output)[0]}.{cfg}', 'w') as file:
+            file.write(graph.to_dot() if cfg == 'dot' else graph.to_json())
+
+    return False
+
+
+def timed_compile(source, output, passes, options, text, cfg, lexer, cache):
+    """
+    Compile a source file and measure it, the unit of work of the batch mode.
+
+    Returns:
+    - tuple: The source, the seconds it took, the error message (None when it compiled) and whether it came from the cache.
+    """
+    start = time.perf_counter()
+    cached = False
+    try:
+        cached = compile_file(source, output, passes, options, text, cfg, lexer, cache)
+        error = None
+    except Exception as exception:
+        error = f'{type(exception).__name__}: {exception}'
+    return source, time.perf_counter() - start, error, cached
+
+
+def collect_sources(patterns, manifest=None):
+    """
+    Expand the sources of a batch into a list of files.
+
+    Parameters:
+    - patterns (list): Files, directories (searched recursively for source files) or glob patterns.
+    - manifest (str): A file listing one source per line, relative to the manifest, or None.
+
+    Returns:
+    - tuple: The source files, without duplicates, and the patterns that matched nothing.
+    """
+    patterns = list(patterns)
+    if manifest:
+        base = os.path.dirname(manifest)
+        with open(manifest, 'r') as file:
+            for line in file:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    patterns.append(os.path.join(base, line))
+
+    sources, unmatched = [], []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, '**', f'*{SOURCE_EXTENSION}'), recursive=True))
+        elif glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+        else:
+            matches = [pattern] if os.path.isfile(pattern) else []
+
+        if not matches:
+            unmatched.append(pattern)
+        sources += matches
+
+    return list(dict.fromkeys(os.path.normpath(source) for source in sources)), unmatched
+
+
+def output_paths(sources, output_dir):
+    """
+    Map every source to its object file, keeping the directory layout below the common directory of the sources.
+
+    Returns:
+    - dict: The object file path by source.
+    """
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(source)) for source in sources])
+    return {
+        source: os.path.join(output_dir, os.path.splitext(os.path.relpath(os.path.abspath(source), root))[0] + '.dk')
+        for source in sources
+    }
+
+
+def compile_batch(sources, output_dir, passes, options, text, cfg, lexer, cache, jobs):
+    """
+    Compile many source files across a pool of worker processes.
+
+    Every worker imports the parser once and compiles many files with it,
+    each in its own CompilationContext.
+    Progress is printed as files finish: the time of every file and the
+    error of the ones that failed. Workers share the cache, which evicts
+    entries once the whole batch is done.
+
+    Returns:
+    - int: The number of files that failed.
+    """
+    outputs = output_paths(sources, output_dir)
+    failed = 0
+    start = time.perf_counter()
+
+    hits = 0
+
+    def report(source, seconds, error, cached):
+        nonlocal hits
+        if error:
+            print(f'FAIL {source} ({seconds * 1000:.1f} ms): {error}', flush=True)
+        else:
+            hits += cached
+            origin = ', cached' if cached else ''
+            print(f'ok   {source} -> {outputs[source]} ({seconds * 1000:.1f} ms{origin})', flush=True)
+        return error is not None
+
+    if jobs == 1:
+        for source in sources:
+            failed += report(*timed_compile(source, outputs[source], passes, options, text, cfg, lexer, cache))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [
+                executor.submit(timed_compile, source, outputs[source], passes, options, text, cfg, lexer, cache)
+                for source in sources
+            ]
+            for future in as_completed(futures):
+                failed += report(*future.result())
+
+    if cache is not None:
+        cache.evict()
+
+    elapsed = time.perf_counter() - start
+    print(f'{len(sources) - failed} compiled ({hits} from the cache), {failed} failed in {elapsed:.2f} s')
+    return failed
+
 
 if __name__ == "__main__":
-    filename = str(sys.argv[1])
-
-    with open(f'tests/{filename}', 'r') as file:
-        code = file.read()
-        output = parse(code)
-        
-        with open(f'out/{filename.split(".")[0]}.dk', 'w') as file:
-            for _, table in output[0].items():
-                for t, c in table.items():
-                    if type(c) == dict:
-                        file.write('𓅭\n')
-                        file.write(f'{t}\n')
-                        for t2, c2 in c.items():
-                            file.write(f'{t2}𓃱{c2}\n')
-                    else:
-                        file.write(f'{t}𓃱{c}\n')
-            file.write('𓃻\n')
-            for value, address in output[1].items():
-                file.write(f'{address}𓃱{value}\n')
-            file.write('𓃻\n')
-            file.write(output[2])
\ No newline at end of file
+    argparser = argparse.ArgumentParser(description="Compile a source file from the tests directory, or many sources with --batch.")
+    argparser.add_argument("filename", type=str, nargs="?", help="The source file to compile.")
+    argparser.add_argument("--text", action="store_true", help="Write the legacy text object format.")
+    argparser.add_argument("-O", "--optimize", action="store_true", help="Run all the optimization passes.")
+    argparser.add_argument("--passes", nargs="+", choices=list(PASSES), default=[], help="Run only the given optimization passes.")
+    argparser.add_argument("--inline-threshold", type=int, default=INLINE_THRESHOLD, help="The largest function body, in quadruples, that is inlined.")
+    argparser.add_argument("--cfg", choices=["dot", "json"], help="Also write the control flow graph of the program.")
+    argparser.add_argument("--lexer", choices=["ply", "scanner"], default="ply", help="The lexer, scanner streams the source through the hand-written scanner.")
+    argparser.add_argument("--no-cache", action="store_true", help="Compile without looking up or storing object files in the compile cache.")
+    argparser.add_argument("--cache-dir", type=str, default=CACHE_DIR, help="The compile cache directory.")
+    argparser.add_argument("--cache-size", type=int, default=CACHE_SIZE // (1024 * 1024), help="The size limit of the compile cache in MB, least recently used entries are evicted over it.")
+    argparser.add_argument("--batch", nargs="+", metavar="SOURCE", help="Compile many sources: files, directories or glob patterns.")
+    argparser.add_argument("--manifest", type=str, help="Compile the sources listed in a file, one per line.")
+    argparser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="The number of worker processes of a batch.")
+    argparser.add_argument("--output-dir", type=str, default="out", help="The directory of the object files of a batch.")
+    args = argparser.parse_args()
+
+    passes = list(PASSES) if args.optimize else args.passes
+    options = {'inline': {'threshold': args.inline_threshold}}
+    cache = None if args.no_cache else CompileCache(args.cache_dir, args.cache_size * 1024 * 1024)
+
+    if args.batch or args.manifest:
+        if args.filename:
+            argparser.error('give either a filename or --batch/--manifest')
+        if args.jobs < 1:
+            argparser.error('--jobs must be at least 1')
+
+        sources, unmatched = collect_sources(args.batch or [], args.manifest)
+        for pattern in unmatched:
+            print(f'No sources match {pattern}', file=sys.stderr)
+        if not sources:
+            argparser.error('no sources to compile')
+
+        failed = compile_batch(sources, args.output_dir, passes, options, args.text, args.cfg, args.lexer, cache, min(args.jobs, len(sources)))
+        sys.exit(1 if failed or unmatched else 0)
+
+    if not args.filename:
+        argparser.error('a filename, --batch or --manifest is required')
+
+    name = args.filename.split(".")[0]
+    compile_file(f'tests/{args.filename}', f'out/{name}.dk', passes, options, args.text, args.cfg, args.lexer, cache)
+    if cache is not None:
+        cache.evict()
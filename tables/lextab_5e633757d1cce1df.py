@@ -0,0 +1,10 @@
+# lextab_5e633757d1cce1df.py. This file automatically created by PLY (version 3.11). Don't edit!
+_tabversion   = '3.10'
+_lextokens    = set(('ADD', 'ASSIGN', 'BRACKET_CLOSE', 'BRACKET_OPEN', 'COMMA', 'CURLY_BRACKET_CLOSE', 'CURLY_BRACKET_OPEN', 'DIVIDE', 'DO', 'ELSE', 'END', 'EQUAL', 'FLOAT', 'FLOAT_CONST', 'ID', 'IF', 'INT', 'INT_CONST', 'LESS_THAN', 'LESS_THAN_EQUAL', 'MAIN', 'MORE_THAN', 'MORE_THAN_EQUAL', 'MULTIPLY', 'NOT_EQUAL', 'PRINT', 'PROGRAM', 'SEMICOLON', 'SQ_BRACKET_CLOSE', 'SQ_BRACKET_OPEN', 'STRING_CONST', 'SUBTRACT', 'TWO_DOTS', 'VAR', 'VOID', 'WHILE'))
+_lexreflags   = 64
+_lexliterals  = ''
+_lexstateinfo = {'INITIAL': 'inclusive'}
+_lexstatere   = {'INITIAL': [('(?P<t_ID>[a-zA-Z_][a-zA-Z_0-9]*)|(?P<t_FLOAT_CONST>[-+]?[0-9]+\\.[0-9]+([eE][-+]?[0-9]+)?)|(?P<t_INT_CONST>[0-9]+)|(?P<t_STRING_CONST>\\"[^\\"]*\\"|\\\'[^\\\']*\\\')|(?P<t_COMMENT>\\#.*)|(?P<t_newline>\\n+)|(?P<t_ADD>\\+)|(?P<t_BRACKET_CLOSE>\\))|(?P<t_BRACKET_OPEN>\\()|(?P<t_CURLY_BRACKET_CLOSE>\\})|(?P<t_CURLY_BRACKET_OPEN>\\{)|(?P<t_EQUAL>==)|(?P<t_LESS_THAN_EQUAL><=)|(?P<t_MORE_THAN_EQUAL>>=)|(?P<t_MULTIPLY>\\*)|(?P<t_NOT_EQUAL>!=)|(?P<t_SQ_BRACKET_CLOSE>\\])|(?P<t_SQ_BRACKET_OPEN>\\[)|(?P<t_ASSIGN>=)|(?P<t_COMMA>,)|(?P<t_DIVIDE>/)|(?P<t_LESS_THAN><)|(?P<t_MORE_THAN>>)|(?P<t_SEMICOLON>;)|(?P<t_SUBTRACT>-)|(?P<t_TWO_DOTS>:)', [None, ('t_ID', 'ID'), ('t_FLOAT_CONST', 'FLOAT_CONST'), None, ('t_INT_CONST', 'INT_CONST'), ('t_STRING_CONST', 'STRING_CONST'), ('t_COMMENT', 'COMMENT'), ('t_newline', 'newline'), (None, 'ADD'), (None, 'BRACKET_CLOSE'), (None, 'BRACKET_OPEN'), (None, 'CURLY_BRACKET_CLOSE'), (None, 'CURLY_BRACKET_OPEN'), (None, 'EQUAL'), (None, 'LESS_THAN_EQUAL'), (None, 'MORE_THAN_EQUAL'), (None, 'MULTIPLY'), (None, 'NOT_EQUAL'), (None, 'SQ_BRACKET_CLOSE'), (None, 'SQ_BRACKET_OPEN'), (None, 'ASSIGN'), (None, 'COMMA'), (None, 'DIVIDE'), (None, 'LESS_THAN'), (None, 'MORE_THAN'), (None, 'SEMICOLON'), (None, 'SUBTRACT'), (None, 'TWO_DOTS')])]}
+_lexstateignore = {'INITIAL': ' \t'}
+_lexstateerrorf = {'INITIAL': 't_error'}
+_lexstateeoff = {}
@@ -1,6 +1,34 @@
+import io
+import os
+import sys
+import glob
+import json
+import zlib
+import shutil
 import argparse
-from x_parser import parser
+import tempfile
+import itertools
+import contextlib
+import subprocess
+
+import vm
+from x_parser import parse
 from x_lexer import lexer
+import x_scanner
+from x_scanner import Scanner
+from compiler import compile_file
+from classes import objectfile
+from classes.context import CompilationContext
+from classes.exceptions import InvalidObjectFileError
+from classes.cache import CompileCache
+from classes.cfg import ControlFlowGraph
+from classes.operators import OPERATORS_NUMERIC
+from classes.optimizer import PASSES
+from classes import batch
+from classes.batch import BatchEngine
+from classes.engine import Engine
+from classes.blocks import BlockEngine
+from classes.memory import MemoryManager, FlatMemoryManager
 
 # Test cases
 
@@ -113,16 +141,570 @@ def test_lexer(n):
 
 
 def test_parser(n):
-    parser.parse(test_cases[n])
+    parse(test_cases[n])
+
+
+# Behavior checks, every one returns the descriptions of its failures
+
+# Engine, memory model and storage of every run compared against the reference
+RUNTIMES = [
+    ('table', 'segments', 'list'),
+    ('table', 'segments', 'array'),
+    ('table', 'flat', 'list'),
+    ('blocks', 'segments', 'list'),
+    ('blocks', 'segments', 'array'),
+    ('legacy', 'segments', 'list'),
+]
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+TESTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests')
+
+# A loop without exits, its division only runs when d is positive
+endless_loop_program = """
+    program endless;
+
+    var d, x : int;
+
+    main {
+        d = 0;
+        while (1 < 2) {
+            if (d > 0) {
+                x = 10 / d;
+            };
+        };
+    }
+    end
+"""
+
+# Every lane of a batch sets n and d
+lanes_program = """
+    program lanes;
+
+    var n, d, s, i : int;
+        x : float;
+
+    void down(k : int) [
+        var t : float;
+            u : int;
+        {
+            print(u);
+            u = k;
+            t = k / 2;
+            s = s + k;
+            if (k > 0) {
+                down(k - 1);
+            };
+            x = x + t;
+        }
+    ];
+
+    main {
+        s = 0;
+        i = 0;
+        x = 0.0;
+        down(n);
+        down(1);
+        while (i < n) {
+            if (i > 2) {
+                s = s * 2;
+            } else {
+                s = s + 1;
+            };
+            i = i + 1;
+        };
+        print(s, x);
+        print(n / d);
+    }
+    end
+"""
+
+big_integers_program = """
+    program big;
+
+    var x : int;
+
+    main {
+        x = 4611686018427387904 * 4;
+        print(x, -x, 99999999999999999999999, -9223372036854775808);
+    }
+    end
+"""
+
+
+def test_programs():
+    """
+    Get the test programs, the tests/*.duck sources.
+
+    Returns:
+    - list: The (name, source) of every program.
+    """
+    programs = []
+    for path in sorted(glob.glob(os.path.join(TESTS_DIR, '*.duck'))):
+        with open(path, 'r') as file:
+            programs.append((os.path.basename(path), file.read()))
+    return programs
+
+
+def expected_output(name):
+    """
+    Get the expected output of a test program, the .out file next to its source.
+
+    Returns:
+    - str: The output, or None if the program has no .out file.
+    """
+    path = os.path.join(TESTS_DIR, os.path.splitext(name)[0] + '.out')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as file:
+        return file.read()
+
+
+def encode_program(code, passes=(), text=False):
+    """
+    Compile a source into an object file.
+
+    Returns:
+    - bytes: The encoded program.
+    """
+    counter_table, constant_table, quadruples = parse(code, passes, context=CompilationContext())
+    return objectfile.dumps(counter_table, constant_table, quadruples.quadruples, text=text)
+
+
+def compile_program(code, passes=(), text=False):
+    """
+    Compile a source and read it back through the object format.
+    """
+    return objectfile.loads(encode_program(code, passes, text))
+
+
+def program_fields(program):
+    """
+    Get the contents of a program in a comparable form, constant values as the text format writes them.
+    """
+    constants = sorted((address, str(value)) for address, value in program.constants)
+    quadruples = [(q.operator, q.left_operand, q.right_operand, q.result) for q in program.quadruples]
+    return program.descriptor, constants, quadruples
+
+
+def check_object_files():
+    """
+    Check that programs read back the same from the binary format, memory mapped or not, and from the text format,
+    and that malformed object files raise InvalidObjectFileError.
+    """
+    failures = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'program.dk')
+
+        for name, code in test_programs() + [('big integers', big_integers_program)]:
+            data = encode_program(code)
+            expected = program_fields(objectfile.loads(encode_program(code, text=True)))
+            if program_fields(objectfile.loads(data)) != expected:
+                failures.append(f'{name}: binary object file differs from text')
+
+            with open(path, 'wb') as file:
+                file.write(data)
+            program = objectfile.load(path)
+            if program_fields(program) != expected:
+                failures.append(f'{name}: memory mapped object file differs from text')
+            program.close()
+
+        data = encode_program(test_programs()[0][1])
+        body = bytearray(data[objectfile.HEADER.size:])
+        # Claim more quadruples than the section holds, behind a valid checksum
+        offset = 0
+        kind, _, length = objectfile.SECTION.unpack_from(body, offset)
+        while kind != objectfile.SECTION_QUADRUPLES:
+            offset += objectfile.SECTION.size + length
+            kind, _, length = objectfile.SECTION.unpack_from(body, offset)
+        objectfile.COUNT.pack_into(body, offset + objectfile.SECTION.size, 1 << 20)
+        header = objectfile.HEADER.pack(objectfile.MAGIC, objectfile.VERSION, 4, zlib.crc32(body))
+
+        text = encode_program(test_programs()[0][1], text=True).decode('utf-8')
+        malformed = [(f'truncated to {size} bytes', data[:size]) for size in (0, 2, 8, 11, len(data) // 2, len(data) - 1)]
+        malformed += [
+            ('corrupted byte', data[:-5] + bytes([data[-5] ^ 0xff]) + data[-4:]),
+            ('unsupported version', objectfile.HEADER.pack(objectfile.MAGIC, 99, 0, 0)),
+            ('quadruple count past the end', header + bytes(body)),
+            ('not UTF-8', b'\xff\xfe\xfd'),
+            ('text without sections', b'int\xf0\x93\x83\xb11\n'),
+            ('text truncated in the constants', text[:text.index(objectfile.TEXT_SECTION) + 4].encode('utf-8')),
+            ('text with a bad quadruple', (text + '\n1 2 x 4').encode('utf-8')),
+        ]
+
+        for name, data in malformed:
+            with open(path, 'wb') as file:
+                file.write(data)
+            try:
+                objectfile.load(path).close()
+                failures.append(f'object file {name}: no error')
+            except InvalidObjectFileError:
+                pass
+            except Exception as exception:
+                failures.append(f'object file {name}: {type(exception).__name__} instead of InvalidObjectFileError')
+    return failures
+
+
+def run_program(program, engine='table', memory='segments', storage='list'):
+    """
+    Execute a compiled program.
+
+    Returns:
+    - str: Everything the program printed.
+    """
+    memory_manager = FlatMemoryManager() if memory == 'flat' else MemoryManager(storage=storage)
+    memory_manager.load(program)
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        if engine == 'legacy':
+            vm.memory_manager = memory_manager
+            vm.execute(program.quadruples)
+        elif engine == 'blocks':
+            BlockEngine(memory_manager, program.quadruples).run()
+        else:
+            Engine(memory_manager, program.quadruples).run()
+    return output.getvalue()
+
+
+def check_engines():
+    """
+    Check that every combination of optimization passes, on every engine, memory model and storage, prints what the unoptimized
+    program prints on the table engine.
+
+    The unoptimized program also runs from the text object format, and
+    its output is compared with the .out file of the program when it has one.
+    """
+    failures = []
+    builds = [((), True)] + [
+        (passes, False)
+        for size in range(len(PASSES) + 1)
+        for passes in itertools.combinations(PASSES, size)
+    ]
+
+    for name, code in test_programs():
+        expected = run_program(compile_program(code))
+        if expected_output(name) not in (None, expected):
+            failures.append(f'{name}: output differs from {os.path.splitext(name)[0]}.out')
+
+        for passes, text in builds:
+            program = compile_program(code, passes, text)
+            for runtime in RUNTIMES:
+                if run_program(program, *runtime) != expected:
+                    build = f'passes {", ".join(passes) or "none"}{", text object file" if text else ""}'
+                    failures.append(f'{name}: {build}, {runtime[0]} engine, {runtime[1]} memory, {runtime[2]} storage')
+    return failures
+
+
+def check_cfg():
+    """
+    Check that the control flow graphs the compiler writes with --cfg partition the quadruples of the object file into
+    blocks whose edges agree, in JSON and in DOT.
+    """
+    failures = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'program.dk')
+
+        for name in sorted(os.listdir(TESTS_DIR)):
+            if not name.endswith('.duck'):
+                continue
+            source = os.path.join(TESTS_DIR, name)
+
+            compile_file(source, path, cfg='json')
+            with open(os.path.join(directory, 'program.json'), 'r') as file:
+                graph = json.load(file)
+            program = objectfile.load(path)
+            quadruples = [[q.operator, q.left_operand, q.right_operand, q.result] for q in program.quadruples]
+            program.close()
+
+            blocks = {block['id']: block for block in graph['blocks']}
+            if [q for block in graph['blocks'] for q in block['quadruples']] != quadruples:
+                failures.append(f'{name}: cfg blocks are not the quadruples of the object file')
+            if graph['entry'] not in blocks or graph['exit'] not in blocks or not set(graph['functions'].values()) <= set(blocks):
+                failures.append(f'{name}: cfg entry, exit or function blocks missing')
+            edges = {(block['id'], successor) for block in graph['blocks'] for successor in block['successors']}
+            reverse = {(predecessor, block['id']) for block in graph['blocks'] for predecessor in block['predecessors']}
+            if edges != reverse:
+                failures.append(f'{name}: cfg successors and predecessors disagree')
+
+            compile_file(source, path, cfg='dot')
+            with open(os.path.join(directory, 'program.dot'), 'r') as file:
+                dot = file.read().splitlines()
+            nodes = {line.split()[0] for line in dot if '[label="B' in line}
+            arrows = {tuple(line.strip().split(';')[0].split(' [')[0].split(' -> ')) for line in dot if ' -> ' in line}
+            calls = {(block['id'], block['call']) for block in graph['blocks'] if block['call'] is not None}
+            if dot[0] != 'digraph cfg {' or dot[-1] != '}':
+                failures.append(f'{name}: cfg DOT is not a digraph')
+            if nodes != {f'B{id}' for id in blocks}:
+                failures.append(f'{name}: cfg DOT nodes differ from the JSON blocks')
+            if arrows != {(f'B{a}', f'B{b}') for a, b in edges | calls}:
+                failures.append(f'{name}: cfg DOT edges differ from the JSON edges')
+    return failures
+
+
+def check_batch():
+    """
+    Check that every lane of the batch engine prints what the table engine prints for the same initial values: the
+    programs in tests/ on identical lanes, and a program whose lanes start from different values, some dividing by zero.
+    """
+    failures = []
+    if batch.np is None:
+        print('skip check_batch, NumPy is not installed')
+        return failures
+
+    for name, code in test_programs():
+        program = compile_program(code)
+        expected = run_program(program).splitlines()
+        memory_manager = MemoryManager()
+        memory_manager.load(program)
+        if BatchEngine(memory_manager, program.quadruples, 3).run() != [expected] * 3:
+            failures.append(f'{name}: batch lanes differ from the table engine')
+
+    context = CompilationContext()
+    counter_table, constant_table, quadruples = parse(lanes_program, context=context)
+    program = objectfile.loads(objectfile.dumps(counter_table, constant_table, quadruples.quadruples))
+    variables = context.function_directory.lookup('lanes').child
+    n, d = variables.lookup('n').address, variables.lookup('d').address
+    initial = {n: [0, 1, 4, 6, 3], d: [1, 2, 0, 4, 0]}
+
+    memory_manager = MemoryManager()
+    memory_manager.load(program)
+    outputs = BatchEngine(memory_manager, program.quadruples, 5, initial).run()
+
+    for lane, output in enumerate(outputs):
+        memory_manager = MemoryManager()
+        memory_manager.load(program)
+        memory_manager.assign(n, initial[n][lane])
+        memory_manager.assign(d, initial[d][lane])
+        printed = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(printed):
+                Engine(memory_manager, program.quadruples).run()
+            expected = printed.getvalue().splitlines()
+        except ZeroDivisionError as error:
+            expected = printed.getvalue().splitlines() + [f'ZeroDivisionError: {error}']
+        # Locals read before being assigned hold 0 in the batch engine
+        expected = ['0' if line == 'None' else line for line in expected]
+        if output != expected:
+            failures.append(f'batch lane {lane}: {output} instead of {expected}')
+    return failures
+
+
+def check_batch_compile():
+    """
+    Check the --batch and --manifest modes of the compiler: the object files they write, keeping the directory layout,
+    and their exit codes when every source compiles, when one fails and when a pattern matches nothing.
+    """
+    failures = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        sources = os.path.join(directory, 'sources')
+        os.makedirs(os.path.join(sources, 'loops'))
+        shutil.copy(os.path.join(TESTS_DIR, 'while.duck'), os.path.join(sources, 'loops', 'while.duck'))
+        shutil.copy(os.path.join(TESTS_DIR, 'factorial.duck'), os.path.join(sources, 'factorial.duck'))
+        with open(os.path.join(directory, 'broken.duck'), 'w') as file:
+            file.write('program broken; main { print(; } end')
+        with open(os.path.join(directory, 'manifest.txt'), 'w') as file:
+            file.write('# Sources relative to the manifest\nsources/factorial.duck\n\nsources/loops/while.duck\n')
+
+        def compile(*arguments):
+            output = os.path.join(directory, 'out')
+            shutil.rmtree(output, ignore_errors=True)
+            command = [sys.executable, 'compiler.py', '--no-cache', '--jobs', '2', '--output-dir', output, *arguments]
+            status = subprocess.run(command, cwd=ROOT_DIR, capture_output=True, text=True).returncode
+            written = sorted(
+                os.path.relpath(os.path.join(path, name), output)
+                for path, _, names in os.walk(output) for name in names
+            )
+            return status, written
+
+        expected = ['factorial.dk', os.path.join('loops', 'while.dk')]
+        runs = [
+            ('directory', ['--batch', sources], 0, expected),
+            ('glob pattern', ['--batch', os.path.join(sources, '**', '*.duck')], 0, expected),
+            ('manifest', ['--manifest', os.path.join(directory, 'manifest.txt')], 0, expected),
+            ('failing source', ['--batch', sources, os.path.join(directory, 'broken.duck')], 1, [os.path.join('sources', name) for name in expected]),
+            ('unmatched pattern', ['--batch', sources, os.path.join(directory, 'missing', '*.duck')], 1, expected),
+            ('no sources', ['--batch', os.path.join(directory, 'missing.duck')], 2, []),
+        ]
+        for name, arguments, status, written in runs:
+            result = compile(*arguments)
+            if result != (status, written):
+                failures.append(f'batch compile {name}: exit code and object files {result} instead of {(status, written)}')
+
+        # The last run wrote nothing, compile the directory again to read its object files
+        compile('--batch', sources)
+        for path in expected:
+            try:
+                objectfile.load(os.path.join(directory, 'out', path)).close()
+            except InvalidObjectFileError as error:
+                failures.append(f'batch compile {path}: {error}')
+    return failures
+
+
+def tokens(lexer_or_scanner):
+    """
+    Read every token of a lexer or scanner as a (type, value, line, position) tuple.
+    """
+    return [(token.type, token.value, token.lineno, token.lexpos) for token in iter(lexer_or_scanner.token, None)]
+
+
+def check_scanner():
+    """
+    Check that the scanner produces the same tokens as the PLY lexer, from a string and from text and UTF-8 streams
+    read in small chunks.
+    """
+    failures = []
+    sources = test_programs() + [(f'test case {n + 1}', code) for n, code in enumerate(test_cases)] + [
+        ('every symbol', 'a<=b >= c==d!=e<f>g = [h](i){j}*k/l+m-n;o:p,q'),
+        ('numbers', '1 12.5 -3.25e+2 +4.0E-1 7e3 0.5.5 -x'),
+        ('unterminated string', 'print("open;\nx = 1;'),
+        ('illegal characters', 'x = 1 @ 2 $;\n\n  y=3.5e-2'),
+        ('strings across lines', "a = 'one\ntwo' + \"three\n\n\";\nb"),
+        ('non ASCII strings', 'print("caf\u00e9 \u2603", \'\U0001f986\');\n# \u00fcber\nx'),
+    ]
+
+    for name, code in sources:
+        ply_lexer = lexer.clone()
+        ply_lexer.lineno = 1
+        # Both print the illegal characters they skip
+        with contextlib.redirect_stdout(io.StringIO()):
+            ply_lexer.input(code)
+            expected = tokens(ply_lexer)
+            readers = [('whole', code, None)]
+            readers += [(f'text chunks of {size}', io.StringIO(code), size) for size in (1, 7, 64)]
+            readers += [(f'UTF-8 chunks of {size}', io.BytesIO(code.encode('utf-8')), size) for size in (1, 3)]
+            for reader, source, size in readers:
+                scanner = Scanner(source) if size is None else Scanner(source, size)
+                if tokens(scanner) != expected:
+                    failures.append(f'{name}: scanner tokens differ from PLY, {reader}')
+    return failures
+
+
+def check_cache():
+    """
+    Check that the compile cache misses, hits with the same object file, ignores the order of the passes and the
+    options of passes that don't run, keys on the lexer, streams sources to the scanner, reads CRLF sources like the
+    uncached compiler, survives entries it can't store and evicts over its size limit.
+    """
+    failures = []
+    inline = {'inline': {'threshold': 4}}
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CompileCache(os.path.join(directory, 'cache'))
+        source = os.path.join(directory, 'factorial.duck')
+        with open(os.path.join(TESTS_DIR, 'factorial.duck'), 'r') as file:
+            code = file.read()
+        with open(source, 'w', newline='\r\n') as file:
+            file.write(code)
+
+        def compiled(name, *arguments, **keywords):
+            path = os.path.join(directory, name)
+            hit = compile_file(source, path, *arguments, **keywords)
+            with open(path, 'rb') as file:
+                return hit, file.read()
+
+        _, uncached = compiled('uncached.dk', ['peephole', 'dead_code'])
+        runs = [
+            ('empty cache', (['peephole', 'dead_code'], inline), {}, False),
+            ('same flags', (['peephole', 'dead_code'], inline), {}, True),
+            ('passes in another order', (['dead_code', 'peephole'], {}), {}, True),
+            ('other passes', (['peephole'],), {}, False),
+            ('other lexer', (['peephole', 'dead_code'],), {'lexer': 'scanner'}, False),
+        ]
+        for name, arguments, keywords, expected in runs:
+            hit, data = compiled('cached.dk', *arguments, cache=cache, **keywords)
+            if hit != expected:
+                failures.append(f'cache: {"hit" if hit else "miss"} with {name}')
+            if data != uncached and arguments[0] == ['peephole', 'dead_code']:
+                failures.append(f'cache: object file with {name} differs from the uncached one')
+
+        # The scanner reads the source file itself, not a copy in memory
+        streamed = []
+        original = x_scanner.Scanner.input
+        x_scanner.Scanner.input = lambda scanner, source: (streamed.append(source), original(scanner, source))[1]
+        try:
+            compiled('streamed.dk', ['dead_code'], lexer='scanner', cache=cache)
+        finally:
+            x_scanner.Scanner.input = original
+        if not streamed or isinstance(streamed[0], str):
+            failures.append('cache: the scanner was not given the source file')
+
+        blocked = CompileCache(os.path.join(directory, 'factorial.duck'))
+        with contextlib.redirect_stderr(io.StringIO()) as warning:
+            try:
+                _, data = compiled('blocked.dk', ['peephole', 'dead_code'], cache=blocked)
+                if data != uncached or 'Could not cache' not in warning.getvalue():
+                    failures.append('cache: an entry that can\'t be stored changes the compile or isn\'t reported')
+            except OSError as error:
+                failures.append(f'cache: an entry that can\'t be stored fails the compile: {error}')
+
+        cache.max_size = 0
+        if cache.evict() != 4 or cache.entries():
+            failures.append('cache: entries left over the size limit')
+        if compiled('cached.dk', ['peephole', 'dead_code'], cache=cache)[0]:
+            failures.append('cache: hit on an evicted entry')
+    return failures
+
+
+def check_loop_invariants():
+    """
+    Check that loop-invariant code motion leaves a division that only runs on some iterations inside a loop without
+    exits, with every combination of passes that runs it.
+
+    The program never ends, so the quadruples are checked instead of its output.
+    """
+    failures = []
+    divide = OPERATORS_NUMERIC['/']
+
+    for size in range(len(PASSES)):
+        for passes in itertools.combinations([name for name in PASSES if name != 'loop_invariants'], size):
+            passes += ('loop_invariants',)
+            graph = ControlFlowGraph(compile_program(endless_loop_program, passes).quadruples)
+            looping = set().union(*(loop.blocks for loop in graph.natural_loops()))
+            if any(q.operator == divide for id, block in graph.blocks.items() if id not in looping for q in block.quadruples):
+                failures.append(f'endless loop: division hoisted out of the loop, passes {", ".join(passes)}')
+    return failures
+
+
+CHECKS = [check_object_files, check_engines, check_cfg, check_loop_invariants, check_batch, check_batch_compile, check_scanner, check_cache]
+
+
+def check():
+    """
+    Run every behavior check and print its failures.
+
+    Returns:
+    - int: The number of failures.
+    """
+    failures = 0
+    for checker in CHECKS:
+        try:
+            found = checker()
+        except Exception as exception:
+            found = [f'{checker.__name__} raised {type(exception).__name__}: {exception}']
+        for failure in found:
+            print(f'FAIL {failure}')
+        print(f'{"ok  " if not found else "FAIL"} {checker.__name__}', flush=True)
+        failures += len(found)
+    return failures
 
 
 if __name__ == "__main__":
     argparser = argparse.ArgumentParser(description="Run specific test case.")
-    argparser.add_argument("test_number", type=int, help="The test case number to run (1-5).")
+    argparser.add_argument("test_number", type=int, nargs="?", help="The test case number to run (1-5).")
     argparser.add_argument("--lexer", action="store_true", help="Run lexer test.")
     argparser.add_argument("--parser", action="store_true", help="Run parser test.")
+    argparser.add_argument("--check", action="store_true", help="Run the behavior checks.")
     args = argparser.parse_args()
 
+    if args.check:
+        sys.exit(1 if check() else 0)
+
+    if args.test_number is None:
+        argparser.error('a test number or --check is required')
+
     if args.lexer:
         test_lexer(args.test_number - 1)
 
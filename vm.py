@@ -1,123 +1,138 @@
-import sys
+import argparse
+import json
 
 from classes.stack import Stack
-from classes.quadruples import QuadrupleList
-from classes.memory import MemoryManager
+from classes.quadruples import QuadrupleBuffer
+from classes.memory import MemoryManager, FlatMemoryManager
+from classes.engine import Engine
+from classes.blocks import BlockEngine
+from classes.batch import BatchEngine
+from classes.operators import OPERATOR_FUNCTIONS, BRANCH_OPERATORS
+from classes import objectfile
 
 memory_manager = MemoryManager()
 function_exit_stack = Stack('function_exit_stack')
 
 def execute(quadruples):
+    # Read the fields of every quadruple in place, no Quadruple is built per fetch
+    if isinstance(quadruples, QuadrupleBuffer):
+        fields = quadruples.fields
+    else:
+        fields = [field for q in quadruples for field in (q.operator, q.left_operand, q.right_operand, q.result)]
+    end = len(fields) // 4
     ip = 0
 
-    while ip < len(quadruples):
-        quadruple = quadruples[ip]
-        
-        left_operand = memory_manager.access(quadruple.left_operand) if quadruple.left_operand != -1 else None
-        right_operand = memory_manager.access(quadruple.right_operand) if quadruple.right_operand != -1 else None
+    while ip < end:
+        index = ip * 4
+        operator = fields[index]
+        left_address = fields[index + 1]
+        right_address = fields[index + 2]
+        result_address = fields[index + 3]
+
+        left_operand = memory_manager.access(left_address) if left_address != -1 else None
+        right_operand = memory_manager.access(right_address) if right_address != -1 else None
 
         result = None
 
-        if quadruple.operator == 1: # -
+        if operator == 1: # -
             result = left_operand - right_operand
-        elif quadruple.operator == 2: # +
+        elif operator == 2: # +
             result = left_operand + right_operand
-        elif quadruple.operator == 3: #. *
+        elif operator == 3: #. *
             result = left_operand * right_operand
-        elif quadruple.operator == 4: # /
+        elif operator == 4: # /
             result = left_operand / right_operand
-        elif quadruple.operator == 5: # <
+        elif operator == 5: # <
             result = left_operand < right_operand
-        elif quadruple.operator == 6: # >
+        elif operator == 6: # >
             result = left_operand > right_operand
-        elif quadruple.operator == 7: # <=
+        elif operator == 7: # <=
             result = left_operand <= right_operand
-        elif quadruple.operator == 8: # >=
+        elif operator == 8: # >=
             result = left_operand >= right_operand
-        elif quadruple.operator == 9: # ==
+        elif operator == 9: # ==
             result = left_operand == right_operand
-        elif quadruple.operator == 10: #. !=
+        elif operator == 10: #. !=
             result = left_operand != right_operand
-        elif quadruple.operator == 11: # =
+        elif operator == 11: # =
             result = left_operand
-        elif quadruple.operator == 12: # PRINT
+        elif operator == 12: # PRINT
             print(left_operand)
-        elif quadruple.operator == 13: # GOTO
-            ip = quadruple.result
+        elif operator == 13: # GOTO
+            ip = result_address
             continue
-        elif quadruple.operator == 14: # GOTOF
+        elif operator == 14: # GOTOF
             if not left_operand:
-                ip = quadruple.result
+                ip = result_address
                 continue
-        elif quadruple.operator == 15: # GOTOT
+        elif operator == 15: # GOTOT
             if left_operand:
-                ip = quadruple.result
+                ip = result_address
                 continue
-        elif quadruple.operator == 16: # GOSUB
+        elif operator == 16: # GOSUB
+            memory_manager.activate_local()
             function_exit_stack.push(ip + 1)
-            ip = quadruple.result
+            ip = result_address
             continue
-        elif quadruple.operator == 17: # ERA
+        elif operator == 17: # ERA
             # Allocate temporal memory
             memory_manager.allocate_local()
-            memory_descriptor = memory_manager.descriptor['local'][quadruple.result]
+            memory_descriptor = memory_manager.descriptor['local'][result_address]
             for type, value in memory_descriptor.items():
                 memory_manager.allocate(type, value)
-        elif quadruple.operator == 18: # ENDFUNC
+        elif operator == 18: # ENDFUNC
             # Deallocate temporal memory
             memory_manager.deallocate_local()
             ip = function_exit_stack.pop()
             continue
-        elif quadruple.operator == 19: # PARAM
-            memory_manager.param(quadruple.left_operand)
+        elif operator == 19: # PARAM
+            memory_manager.param(left_address, result_address)
+        elif operator == 32: # TAILSUB
+            memory_manager.replace_local()
+            ip = result_address
+            continue
+        elif operator in BRANCH_OPERATORS: # GOTOF< ... GOTOT!=
+            jump, relational = BRANCH_OPERATORS[operator]
+            if OPERATOR_FUNCTIONS[relational](left_operand, right_operand) == (jump == 'GOTOT'):
+                ip = result_address
+                continue
         if result is not None:
-            memory_manager.assign(quadruple.result, result)
+            memory_manager.assign(result_address, result)
 
         ip += 1
 
 
 if __name__ == "__main__":
-    filename = str(sys.argv[1])
-
-    with open(f'out/{filename}', 'r') as file:
-        # Allocate memory segments
-        line = file.readline().strip()
-
-        while line != '𓅭' and line != '𓃻':
-            type, size = line.split('𓃱')
-            memory_manager.describe(type=type, size=int(size))
-            line = file.readline().strip()
-
-        while line != '𓃻':
-            line = file.readline().strip()  
-            function = line
-            line = file.readline().strip()
-
-            while line != '𓅭' and line != '𓃻':
-                type, size = line.split('𓃱')
-                memory_manager.describe(type=type, size=int(size), function=int(function))
-                line = file.readline().strip()
-
-        # Allocate global memory
-        for key, value in memory_manager.descriptor['global'].items():
-            memory_manager.allocate(key, value)
-
-        # Apply constants
-        line = file.readline().strip()
-
-        while line != '𓃻':
-            address, value = line.split('𓃱')
-            memory_manager.assign(int(address), value)
-            line = file.readline().strip()
-
-        # Read quadruples
-        quadruples = QuadrupleList()
-
-        line = file.readline().strip()
-
-        while line:
-            operator, left_operand, right_operand, result = line.split(' ')
-            quadruples.add(int(operator), int(left_operand), int(right_operand), int(result))
-            line = file.readline().strip()
-
-        execute(quadruples.quadruples)
\ No newline at end of file
+    argparser = argparse.ArgumentParser(description="Execute a compiled program from the out directory.")
+    argparser.add_argument("filename", type=str, help="The compiled program to execute.")
+    argparser.add_argument("--engine", choices=["table", "blocks", "legacy"], default="table", help="The execution engine.")
+    argparser.add_argument("--storage", choices=["list", "array"], default="list", help="The storage of int and float memory segments.")
+    argparser.add_argument("--memory", choices=["segments", "flat"], default="segments", help="The memory model, flat runs with the table engine only.")
+    argparser.add_argument("--batch", type=str, help="Run once per lane with the initial global values of a JSON file {address: value or list of values per lane} and print the output of every lane as JSON.")
+    argparser.add_argument("--lanes", type=int, help="The number of batch runs, the length of the longest list of initial values by default.")
+    args = argparser.parse_args()
+
+    if args.memory == 'flat':
+        if args.engine != 'table' or args.storage != 'list':
+            argparser.error('--memory flat runs with the table engine and list storage only')
+        memory_manager = FlatMemoryManager()
+    else:
+        memory_manager = MemoryManager(storage=args.storage)
+
+    program = objectfile.load(f'out/{args.filename}')
+
+    # Allocate memory segments and apply constants
+    memory_manager.load(program)
+
+    if args.batch:
+        with open(args.batch, 'r') as file:
+            initial = json.load(file)
+        lanes = args.lanes or max([len(v) for v in initial.values() if isinstance(v, list)], default=1)
+        print(json.dumps(BatchEngine(memory_manager, program.quadruples, lanes, initial).run()))
+    elif args.engine == 'legacy':
+        execute(program.quadruples)
+    elif args.engine == 'blocks':
+        BlockEngine(memory_manager, program.quadruples).run()
+    else:
+        Engine(memory_manager, program.quadruples).run()
+    program.close()
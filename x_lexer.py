@@ -6,7 +6,9 @@ converting the input source code into a stream of tokens. The lexer is
 implemented as a generator that yields tokens one at a time.
 """
 
-import ply.lex as lex
+import sys
+
+from classes.tables import build_lexer
 
 # Dict of reserved keywords
 reserved_keywords = {
@@ -110,5 +112,5 @@ def t_error(t):
     print(f'Illegal character {t.value[0]}')
     t.lexer.skip(1)
 
-# Build the lexer
-lexer = lex.lex()
\ No newline at end of file
+# Build the lexer, in optimized mode from its cached tables
+lexer = build_lexer(sys.modules[__name__])
\ No newline at end of file
@@ -3,44 +3,79 @@ Parser module for the compiler.
 
 This module is responsible for parsing the stream of tokens generated by the
 lexer. The parser is implemented as a recursive descent parser.
+
+The grammar actions keep no state of their own: every parse gets a fresh
+CompilationContext, attached to its own copy of the lexer, which the actions
+reach through p.lexer.context.
 """
-import ply.yacc as yacc
+import os
+import sys
 
-from x_lexer import tokens
-from classes.stack import Stack
+from x_lexer import tokens, lexer
 from classes.symbols import Symbol, SymbolTable
-from classes.quadruples import QuadrupleBuilder
+from classes.context import CompilationContext
 from classes.semantic import validate_semantics
-from classes.memory import MemoryAssigner
+from classes.memory import CASTS
+from classes.operators import OPERATORS_NUMERIC, OPERATOR_FUNCTIONS, RELATIONAL_OPERATORS
+from classes.optimizer import optimize
+from classes.tables import build_parser
 from classes.exceptions import (
     UndeclaredError,
     InvalidTypeError,
+    InvalidSyntaxError,
 )
 
-# Global variable to store the symbol table
-function_directory = None
-# Scope stack (function declaration)
-scope_stack = Stack('scope_stack')
-# ID stack (variable declaration)
-id_stack = Stack('id_stack')
-# Jump Stack (conditions and cycles)
-jump_stack = Stack('jump_stack')
-# Function Call Stack (function calls)
-f_call_stack = Stack('f_call_stack')
-# Function Call Param Stack (function calls)
-f_call_param_stack = Stack('f_call_param_stack')
-# Function Call Param Type Stack (function calls)
-f_call_param_type_stack = Stack('f_call_param_type_stack')
-# Operator Stack (expressions)
-operator_stack = Stack('operator_stack')
-# Operand Stack (expressions)
-operand_stack = Stack('operand_stack')
-# Operator Type Stack (expressions)
-operand_type_stack = Stack('operand_type_stack')
-# Quadruple Builder
-quadruples = QuadrupleBuilder()
-# Memory Assigner
-memory_assigner = MemoryAssigner()
+def fold_constants(context, operator, left_operand, right_operand, result_type):
+    """
+    Fold an operation over two constants into a pooled constant.
+
+    Parameters:
+    - operator (str): The operator.
+    - left_operand (int): The left operand address.
+    - right_operand (int): The right operand address.
+    - result_type (str): The type of the result.
+
+    Returns:
+    - int: The address of the folded constant, or None if the operation can't be folded.
+    """
+    if not (context.memory_assigner.is_constant(left_operand) and context.memory_assigner.is_constant(right_operand)):
+        return None
+
+    left_value = context.memory_assigner.constant(left_operand)
+    right_value = context.memory_assigner.constant(right_operand)
+
+    if isinstance(left_value, str) or isinstance(right_value, str):
+        return None
+    # Division by zero is left to fail at runtime
+    if operator == '/' and right_value == 0:
+        return None
+
+    value = CASTS[result_type](OPERATOR_FUNCTIONS[operator](left_value, right_value))
+    return context.memory_assigner.assign(f'c_{result_type}', value)
+
+def add_branch(context, jump, condition, target):
+    """
+    Add a conditional jump on a condition.
+
+    When the condition is the temporal produced by the last quadruple, a
+    comparison, the comparison is fused with the jump into a single
+    compare-and-branch quadruple (GOTOF<, GOTOT>=, ...) and the temporal
+    is never written.
+
+    Parameters:
+    - jump (str): The jump operator [GOTOF, GOTOT].
+    - condition (int): The condition address.
+    - target (int): The target quadruple index, -1 to fill it later.
+    """
+    last = context.quadruples.quadruples[-1]
+    relational = {OPERATORS_NUMERIC[operator]: operator for operator in RELATIONAL_OPERATORS}.get(last.operator)
+
+    if relational is not None and last.result == condition:
+        last.operator = OPERATORS_NUMERIC[f'{jump}{relational}']
+        last.result = target
+    else:
+        context.quadruples.add(jump, condition, -1, target)
+    context.memory_assigner.release(condition)
 
 def p_prog(p):
     """PROG : PROG_N1 PROG_N2 SEMICOLON PROG_1 PROG_N3 BODY END"""
@@ -52,21 +87,22 @@ def p_prog(p):
 
 def p_prog_n1(p):
     """PROG_N1 : PROGRAM"""
-    global function_directory
-    function_directory = SymbolTable()
-    quadruples.add('GOTO', -1, -1, -1)
-    jump_stack.push(quadruples.current())
+    context = p.lexer.context
+    context.function_directory = SymbolTable()
+    context.quadruples.add('GOTO', -1, -1, -1)
+    context.jump_stack.push(context.quadruples.current())
 
 def p_prog_n2(p):
     """PROG_N2 : ID"""
-    function_directory.declare(
+    context = p.lexer.context
+    context.function_directory.declare(
         Symbol(
             name=p[1],
             type='table.global',
             child=SymbolTable()
         )
     )
-    scope_stack.push(p[1])
+    context.scope_stack.push(p[1])
 
 def p_prog_1(p):
     """PROG_1 : VARS PROG_2 
@@ -83,22 +119,25 @@ def p_vars(p):
 
 def p_prog_n3(p):
     """PROG_N3 : MAIN"""
-    main = jump_stack.pop()
-    quadruples.fill(main, quadruples.current() + 1)
+    context = p.lexer.context
+    main = context.jump_stack.pop()
+    context.quadruples.fill(main, context.quadruples.current() + 1)
 
 def p_vars_n1(p):
     """VARS_N1 : VAR"""
-    if not function_directory.lookup(scope_stack.peek()).child:
-        scope_vars = function_directory.lookup(scope_stack.peek())
+    context = p.lexer.context
+    if not context.function_directory.lookup(context.scope_stack.peek()).child:
+        scope_vars = context.function_directory.lookup(context.scope_stack.peek())
         scope_vars.child = SymbolTable()
-        function_directory.update(scope_vars)
+        context.function_directory.update(scope_vars)
 
 def p_vars_1(p):
     """VARS_1 : VARS_N2 VARS_2"""
     
 def p_vars_n2(p):
     """VARS_N2 : ID"""
-    id_stack.push(p[1])
+    context = p.lexer.context
+    context.id_stack.push(p[1])
 
 def p_vars_2(p):
     """VARS_2 : TWO_DOTS VARS_N3 SEMICOLON VARS_3
@@ -107,13 +146,14 @@ def p_vars_2(p):
 
 def p_vars_n3(p):
     """VARS_N3 : TYPE"""
-    scope = scope_stack.peek()
-    scope_vars = function_directory.lookup(scope)
-    for id in id_stack.items():
-        if scope_stack.size() > 1:
-            memory_address = memory_assigner.assign_local(scope_vars.address, f'l_{p[1]}')
+    context = p.lexer.context
+    scope = context.scope_stack.peek()
+    scope_vars = context.function_directory.lookup(scope)
+    for id in context.id_stack.items():
+        if context.scope_stack.size() > 1:
+            memory_address = context.memory_assigner.assign_local(scope_vars.address, f'l_{p[1]}')
         else:
-            memory_address = memory_assigner.assign(f'g_{p[1]}')
+            memory_address = context.memory_assigner.assign(f'g_{p[1]}')
         scope_vars.child.declare(
             Symbol(
                 name=id,
@@ -121,8 +161,8 @@ def p_vars_n3(p):
                 address=memory_address
             )
         )
-        function_directory.update(scope_vars)
-    id_stack.clear()
+        context.function_directory.update(scope_vars)
+    context.id_stack.clear()
 
 def p_vars_3(p):
     """VARS_3 : VARS_1
@@ -134,8 +174,9 @@ def p_funcs(p):
 
 def p_funcs_n1(p):
     """FUNCS_N1 : ID"""
-    memory_address = memory_assigner.assign('g_void')
-    function_directory.declare(
+    context = p.lexer.context
+    memory_address = context.memory_assigner.assign('g_void')
+    context.function_directory.declare(
         Symbol(
             name=p[1],
             type='table.local',
@@ -143,7 +184,7 @@ def p_funcs_n1(p):
             address=memory_address
         )
     )
-    scope_stack.push(p[1])
+    context.scope_stack.push(p[1])
 
 def p_funcs_1(p):
     """FUNCS_1 : FUNCS_2
@@ -157,16 +198,18 @@ def p_funcs_2(p):
 
 def p_funcs_n2(p):
     """FUNCS_N2 : ID TWO_DOTS TYPE"""
-    scope = scope_stack.peek()
-    scope_vars = function_directory.lookup(scope)
-    memory_address = memory_assigner.assign_local(scope_vars.address, f'l_{p[3]}')
+    context = p.lexer.context
+    scope = context.scope_stack.peek()
+    scope_vars = context.function_directory.lookup(scope)
+    memory_address = context.memory_assigner.assign_local(scope_vars.address, f'l_{p[3]}')
     scope_vars.child.declare(Symbol(name=p[1], type=f'param.{p[3]}', address=memory_address))
-    function_directory.update(scope_vars)
+    context.function_directory.update(scope_vars)
 
 def p_funcs_n3(p):
     """FUNCS_N3 : SEMICOLON"""
-    scope_stack.pop()
-    quadruples.add('ENDFUNC', -1, -1, -1)
+    context = p.lexer.context
+    context.scope_stack.pop()
+    context.quadruples.add('ENDFUNC', -1, -1, -1)
 
 def p_funcs_3(p):
     """FUNCS_3 : COMMA FUNCS_2
@@ -177,9 +220,10 @@ def p_funcs_n4(p):
     """FUNCS_N4 : VARS
             | empty
     """
-    scope_vars = function_directory.lookup(scope_stack.peek())
-    scope_vars.update_index(quadruples.current() + 1)
-    function_directory.update(scope_vars)
+    context = p.lexer.context
+    scope_vars = context.function_directory.lookup(context.scope_stack.peek())
+    scope_vars.update_index(context.quadruples.current() + 1)
+    context.function_directory.update(scope_vars)
 
 def p_type(p):
     """TYPE : INT
@@ -212,38 +256,42 @@ def p_assignment_n1(p):
 
 def p_assignment_n2(p):
     """ASSIGNMENT_N2 : ASSIGN"""
-    operator_stack.push(p[1])
+    context = p.lexer.context
+    context.operator_stack.push(p[1])
 
 def p_assignment_n3(p):
     """ASSIGNMENT_N3 : EXPRESSION"""
-    if operator_stack.peek() == '=':
-        operator = operator_stack.pop()
-        operand = operand_stack.pop()
-        operand_type = operand_type_stack.pop()
-        assignee = operand_stack.pop()
-        assignee_type = operand_type_stack.pop()
+    context = p.lexer.context
+    if context.operator_stack.peek() == '=':
+        operator = context.operator_stack.pop()
+        operand = context.operand_stack.pop()
+        operand_type = context.operand_type_stack.pop()
+        assignee = context.operand_stack.pop()
+        assignee_type = context.operand_type_stack.pop()
 
         result = assignee
         result_type = validate_semantics(assignee_type, operand_type, operator)
         
-        quadruples.add(operator, operand, -1, result)
+        context.quadruples.add(operator, operand, -1, result)
+        context.memory_assigner.release(operand)
 
-        operand_stack.push(result)
-        operand_type_stack.push(result_type)
+        context.operand_stack.push(result)
+        context.operand_type_stack.push(result_type)
 
 def p_condition(p):
     """CONDITION : IF BRACKET_OPEN EXPRESSION CONDITION_N1 BODY CONDITION_1"""
 
 def p_condition_n1(p):
     """CONDITION_N1 : BRACKET_CLOSE"""
-    expression_type = operand_type_stack.pop()
+    context = p.lexer.context
+    expression_type = context.operand_type_stack.pop()
 
     if expression_type != 'bool':
         raise InvalidTypeError('Condition expression must be of type bool')
     else:
-        expression_result = operand_stack.pop()
-        quadruples.add('GOTOF', expression_result, -1, -1)
-        jump_stack.push(quadruples.current())
+        expression_result = context.operand_stack.pop()
+        add_branch(context, 'GOTOF', expression_result, -1)
+        context.jump_stack.push(context.quadruples.current())
 
 def p_condition_1(p):
     """CONDITION_1 : CONDITION_N3 BODY CONDITION_N2
@@ -252,74 +300,91 @@ def p_condition_1(p):
 
 def p_condition_n2(p):
     """CONDITION_N2 : SEMICOLON"""
-    end = jump_stack.pop()
-    quadruples.fill(end, quadruples.current() + 1)
+    context = p.lexer.context
+    end = context.jump_stack.pop()
+    context.quadruples.fill(end, context.quadruples.current() + 1)
 
 def p_condition_n3(p):
     """CONDITION_N3 : ELSE"""
-    quadruples.add('GOTO', -1, -1, -1)
-    false = jump_stack.pop()
-    jump_stack.push(quadruples.current())
-    quadruples.fill(false, quadruples.current() + 1)
+    context = p.lexer.context
+    context.quadruples.add('GOTO', -1, -1, -1)
+    false = context.jump_stack.pop()
+    context.jump_stack.push(context.quadruples.current())
+    context.quadruples.fill(false, context.quadruples.current() + 1)
 
 def p_cycle(p):
     """CYCLE : CYCLE_N1 BODY WHILE BRACKET_OPEN EXPRESSION CYCLE_N2 SEMICOLON"""
 
 def p_cylce_n1(p):
     """CYCLE_N1 : DO"""
-    jump_stack.push(quadruples.current() + 1)
+    context = p.lexer.context
+    context.jump_stack.push(context.quadruples.current() + 1)
 
 def p_cycle_n2(p):
     """CYCLE_N2 : BRACKET_CLOSE"""
-    expression_type = operand_type_stack.pop()
+    context = p.lexer.context
+    expression_type = context.operand_type_stack.pop()
 
     if expression_type != 'bool':
         raise InvalidTypeError('Cycle expression must be of type bool')
     else:
-        expression_result = operand_stack.pop()
-        quadruples.add('GOTOT', expression_result, -1, jump_stack.pop())
+        expression_result = context.operand_stack.pop()
+        add_branch(context, 'GOTOT', expression_result, context.jump_stack.pop())
 
 def p_cycle2(p):
     """CYCLE2 : WHILE CYCLE2_N1 EXPRESSION CYCLE2_N2 BODY CYCLE2_N3"""
 
 def p_cycle2_n1(p):
     """CYCLE2_N1 : BRACKET_OPEN"""
-    jump_stack.push(quadruples.current() + 1)
+    context = p.lexer.context
+    context.jump_stack.push(context.quadruples.current() + 1)
 
 def p_cycle2_n2(p):
     """CYCLE2_N2 : BRACKET_CLOSE"""
-    expression_type = operand_type_stack.pop()
+    context = p.lexer.context
+    expression_type = context.operand_type_stack.pop()
 
     if expression_type != 'bool':
         raise InvalidTypeError('Cycle expression must be of type bool')
     else:
-        expression_result = operand_stack.pop()
-        quadruples.add('GOTOF', expression_result, -1, -1)
-        jump_stack.push(quadruples.current())
+        expression_result = context.operand_stack.pop()
+        add_branch(context, 'GOTOF', expression_result, -1)
+        context.jump_stack.push(context.quadruples.current())
 
 def p_cycle2_n3(p):
     """CYCLE2_N3 : SEMICOLON"""
-    false = jump_stack.pop()
-    end = jump_stack.pop()
-    quadruples.add('GOTO', -1, -1, end)
-    quadruples.fill(false, quadruples.current() + 1)
+    context = p.lexer.context
+    false = context.jump_stack.pop()
+    end = context.jump_stack.pop()
+    context.quadruples.add('GOTO', -1, -1, end)
+    context.quadruples.fill(false, context.quadruples.current() + 1)
 
 def p_f_call(p):
     """F_CALL : F_CALL_N1 F_CALL_N4 F_CALL_1"""
 
 def p_f_call_n1(p):
     """F_CALL_N1 : ID"""
-    function_directory.lookup(p[1])
-    f_call_stack.push(p[1])
+    context = p.lexer.context
+    context.function_directory.lookup(p[1])
+    context.f_call_stack.push(p[1])
 
 def p_f_call_1(p):
     """F_CALL_1 : F_CALL_N2 F_CALL_2"""
 
 def p_f_call_n2(p):
     """F_CALL_N2 : EXPRESSION"""
-    f_call_param_stack.push(operand_stack.pop())
-    f_call_param_type_stack.push(operand_type_stack.pop())
-    quadruples.add('PARAM', f_call_param_stack.peek(), -1, -1)
+    context = p.lexer.context
+    context.f_call_param_stack.push(context.operand_stack.pop())
+    context.f_call_param_type_stack.push(context.operand_type_stack.pop())
+
+    # The parameter slot of the callee frame is emitted as the result
+    function_table = context.function_directory.lookup(context.f_call_stack.peek())
+    function_params = [symbol for symbol in function_table.child.symbols.values() if symbol.type.split('.')[0] == 'param']
+    param_index = context.f_call_param_stack.size() - 1
+    param_address = function_params[param_index].address if param_index < len(function_params) else -1
+
+    context.quadruples.add('PARAM', context.f_call_param_stack.peek(), -1, param_address)
+    context.memory_assigner.release(context.f_call_param_stack.peek())
 
 def p_f_call_2(p):
     """F_CALL_2 : COMMA F_CALL_1
@@ -328,14 +393,15 @@ def p_f_call_2(p):
 
 def p_f_call_n3(p):
     """F_CALL_N3 : SEMICOLON"""
-    function_id = f_call_stack.pop()
-    function_table = function_directory.lookup(function_id)
+    context = p.lexer.context
+    function_id = context.f_call_stack.pop()
+    function_table = context.function_directory.lookup(function_id)
     function_params = [symbol[1] for symbol in function_table.child.symbols.items() if symbol[1].type.split('.')[0] == 'param']
 
-    if len(function_params) != len(f_call_param_stack.items()):
-        raise InvalidTypeError(f'Function {function_id} expects {len(function_params)} parameters, {len(f_call_param_stack.items())} given')
+    if len(function_params) != len(context.f_call_param_stack.items()):
+        raise InvalidTypeError(f'Function {function_id} expects {len(function_params)} parameters, {len(context.f_call_param_stack.items())} given')
     
-    recieved_param_types = f_call_param_type_stack.items()
+    recieved_param_types = context.f_call_param_type_stack.items()
 
     for i in range(len(function_params)):
         fp_type = function_params[i].type.split('.')[-1]
@@ -344,15 +410,16 @@ def p_f_call_n3(p):
         if fp_type != rp_type:
             raise InvalidTypeError(f'Function {function_id} expects parameter {i + 1} of type {fp_type}, {rp_type} given')        
 
-    quadruples.add('GOSUB', function_table.address, -1, function_table.index)
+    context.quadruples.add('GOSUB', function_table.address, -1, function_table.index)
 
-    f_call_param_stack.clear()
-    f_call_param_type_stack.clear()
+    context.f_call_param_stack.clear()
+    context.f_call_param_type_stack.clear()
 
 def p_f_call_n4(p):
     """F_CALL_N4 : BRACKET_OPEN"""
-    function_address = function_directory.lookup(f_call_stack.peek()).address
-    quadruples.add('ERA', -1, -1, function_address)
+    context = p.lexer.context
+    function_address = context.function_directory.lookup(context.f_call_stack.peek()).address
+    context.quadruples.add('ERA', -1, -1, function_address)
 
 def p_prints(p):
     """PRINTS : PRINT BRACKET_OPEN PRINTS_1"""
@@ -364,8 +431,10 @@ def p_prints_n1(p):
     """PRINTS_N1 : EXPRESSION
                 | CONSTANT_STRING
     """
-    quadruples.add('PRINT', operand_stack.pop(), -1, -1)
-    operand_type_stack.pop()
+    context = p.lexer.context
+    context.quadruples.add('PRINT', context.operand_stack.peek(), -1, -1)
+    context.memory_assigner.release(context.operand_stack.pop())
+    context.operand_type_stack.pop()
 
 def p_prints_2(p):
     """PRINTS_2 : COMMA PRINTS_1
@@ -388,44 +457,55 @@ def p_expression_n1(p):
                     | EQUAL
                     | NOT_EQUAL
     """
-    operator_stack.push(p[1])
+    context = p.lexer.context
+    context.operator_stack.push(p[1])
 
 def p_expression_n2(p):
     """EXPRESSION_N2 : EXP"""
-    if operator_stack.peek() in ['<', '>', '<=', '>=', '==', '!=']:
-        operator = operator_stack.pop()
-        right_operand = operand_stack.pop()
-        right_operand_type = operand_type_stack.pop()
-        left_operand = operand_stack.pop()
-        left_operand_type = operand_type_stack.pop()
+    context = p.lexer.context
+    if context.operator_stack.peek() in ['<', '>', '<=', '>=', '==', '!=']:
+        operator = context.operator_stack.pop()
+        right_operand = context.operand_stack.pop()
+        right_operand_type = context.operand_type_stack.pop()
+        left_operand = context.operand_stack.pop()
+        left_operand_type = context.operand_type_stack.pop()
 
         result_type = validate_semantics(left_operand_type, right_operand_type, operator)
-        result_address = memory_assigner.assign(f't_{result_type}')
+        result_address = fold_constants(context, operator, left_operand, right_operand, result_type)
 
-        quadruples.add(operator, left_operand, right_operand, result_address)
+        if result_address is None:
+            context.memory_assigner.release(left_operand)
+            context.memory_assigner.release(right_operand)
+            result_address = context.memory_assigner.assign(f't_{result_type}')
+            context.quadruples.add(operator, left_operand, right_operand, result_address)
 
-        operand_stack.push(result_address)
-        operand_type_stack.push(result_type)
+        context.operand_stack.push(result_address)
+        context.operand_type_stack.push(result_type)
 
 def p_exp(p):
     """EXP : EXP_N1 EXP_1"""
 
 def p_exp_n1(p):
     """EXP_N1 : TERM"""
-    if operator_stack.peek() in ['+', '-']:
-        operator = operator_stack.pop()
-        right_operand = operand_stack.pop()
-        right_operand_type = operand_type_stack.pop()
-        left_operand = operand_stack.pop()
-        left_operand_type = operand_type_stack.pop()
+    context = p.lexer.context
+    if context.operator_stack.peek() in ['+', '-']:
+        operator = context.operator_stack.pop()
+        right_operand = context.operand_stack.pop()
+        right_operand_type = context.operand_type_stack.pop()
+        left_operand = context.operand_stack.pop()
+        left_operand_type = context.operand_type_stack.pop()
 
         result_type = validate_semantics(left_operand_type, right_operand_type, operator)
-        result_address = memory_assigner.assign(f't_{result_type}')
+        result_address = fold_constants(context, operator, left_operand, right_operand, result_type)
 
-        quadruples.add(operator, left_operand, right_operand, result_address)
+        if result_address is None:
+            context.memory_assigner.release(left_operand)
+            context.memory_assigner.release(right_operand)
+            result_address = context.memory_assigner.assign(f't_{result_type}')
+            context.quadruples.add(operator, left_operand, right_operand, result_address)
 
-        operand_stack.push(result_address)
-        operand_type_stack.push(result_type)
+        context.operand_stack.push(result_address)
+        context.operand_type_stack.push(result_type)
 
 def p_exp_1(p):
     """EXP_1 : EXP_N2 EXP
@@ -436,27 +516,33 @@ def p_exp_n2(p):
     """EXP_N2 : ADD
             | SUBTRACT
     """
-    operator_stack.push(p[1])
+    context = p.lexer.context
+    context.operator_stack.push(p[1])
 
 def p_term(p):
     """TERM : TERM_N1 TERM_1"""
 
 def p_term_n1(p):
     """TERM_N1 : FACTOR"""
-    if operator_stack.peek() in ['*', '/']:
-        operator = operator_stack.pop()
-        right_operand = operand_stack.pop()
-        right_operand_type = operand_type_stack.pop()
-        left_operand = operand_stack.pop()
-        left_operand_type = operand_type_stack.pop()
+    context = p.lexer.context
+    if context.operator_stack.peek() in ['*', '/']:
+        operator = context.operator_stack.pop()
+        right_operand = context.operand_stack.pop()
+        right_operand_type = context.operand_type_stack.pop()
+        left_operand = context.operand_stack.pop()
+        left_operand_type = context.operand_type_stack.pop()
 
         result_type = validate_semantics(left_operand_type, right_operand_type, operator)
-        result_address = memory_assigner.assign(f't_{result_type}')
+        result_address = fold_constants(context, operator, left_operand, right_operand, result_type)
 
-        quadruples.add(operator, left_operand, right_operand, result_address)
+        if result_address is None:
+            context.memory_assigner.release(left_operand)
+            context.memory_assigner.release(right_operand)
+            result_address = context.memory_assigner.assign(f't_{result_type}')
+            context.quadruples.add(operator, left_operand, right_operand, result_address)
 
-        operand_stack.push(result_address)
-        operand_type_stack.push(result_type)
+        context.operand_stack.push(result_address)
+        context.operand_type_stack.push(result_type)
 
 def p_term_1(p):
     """TERM_1 : TERM_N2 TERM
@@ -467,7 +553,8 @@ def p_term_n2(p):
     """TERM_N2 : MULTIPLY
             | DIVIDE
     """
-    operator_stack.push(p[1])
+    context = p.lexer.context
+    context.operator_stack.push(p[1])
 
 def p_factor(p):
     """FACTOR : FACTOR_N1 EXPRESSION FACTOR_N2
@@ -477,33 +564,40 @@ def p_factor(p):
 
 def p_factor_n1(p):
     """FACTOR_N1 : BRACKET_OPEN"""
-    operator_stack.push(p[1])
+    context = p.lexer.context
+    context.operator_stack.push(p[1])
 
 def p_factor_n2(p):
     """FACTOR_N2 : BRACKET_CLOSE"""
-    operator_stack.pop()
+    context = p.lexer.context
+    context.operator_stack.pop()
 
 def p_factor_n3(p):
     """FACTOR_N3 : ADD
                 | SUBTRACT
     """
-    operator_stack.push(p[1])
+    context = p.lexer.context
+    context.operator_stack.push(p[1])
 
 def p_factor_n4(p):
     """FACTOR_N4 : empty"""
+    context = p.lexer.context
     operator = '*'
-    right_operand = operand_stack.pop()
-    right_operand_type = operand_type_stack.pop()
-    left_operand = -1 if operator_stack.pop() == '-' else 1
+    right_operand = context.operand_stack.pop()
+    right_operand_type = context.operand_type_stack.pop()
+    left_operand = context.memory_assigner.assign('c_int', -1 if context.operator_stack.pop() == '-' else 1)
     left_operand_type = 'int'
 
     result_type = validate_semantics(left_operand_type, right_operand_type, operator)
-    result_address = memory_assigner.assign(f't_{result_type}')
+    result_address = fold_constants(context, operator, left_operand, right_operand, result_type)
 
-    quadruples.add(operator, left_operand, right_operand, result_address)
+    if result_address is None:
+        context.memory_assigner.release(right_operand)
+        result_address = context.memory_assigner.assign(f't_{result_type}')
+        context.quadruples.add(operator, left_operand, right_operand, result_address)
 
-    operand_stack.push(result_address)
-    operand_type_stack.push(result_type)
+    context.operand_stack.push(result_address)
+    context.operand_type_stack.push(result_type)
 
 def p_factor_1(p):
     """FACTOR_1 : CONSTANT
@@ -512,14 +606,15 @@ def p_factor_1(p):
 
 def p_identifier(p):
     """IDENTIFIER : ID"""
+    context = p.lexer.context
     id_symbol = None
 
-    scopes = scope_stack.items()
+    scopes = context.scope_stack.items()
     scopes.reverse()
 
     for scope in scopes:
         try:
-            symbol_table = function_directory.lookup(scope).child
+            symbol_table = context.function_directory.lookup(scope).child
             if symbol_table.lookup(p[1]):
                 id_symbol = symbol_table.lookup(p[1])
                 break
@@ -529,8 +624,8 @@ def p_identifier(p):
     if not id_symbol:
         raise UndeclaredError(f'Symbol {p[1]} is not declared')
 
-    operand_stack.push(id_symbol.address)
-    operand_type_stack.push(id_symbol.type)
+    context.operand_stack.push(id_symbol.address)
+    context.operand_type_stack.push(id_symbol.type)
 
 def p_constant(p):
     """CONSTANT : CONSTANT_INT
@@ -539,45 +634,61 @@ def p_constant(p):
 
 def p_constant_int(p):
     """CONSTANT_INT : INT_CONST"""
-    operand_address = memory_assigner.assign('c_int', p[1])
-    operand_stack.push(operand_address)
-    operand_type_stack.push('int')
+    context = p.lexer.context
+    operand_address = context.memory_assigner.assign('c_int', p[1])
+    context.operand_stack.push(operand_address)
+    context.operand_type_stack.push('int')
 
 def p_constant_float(p):
     """CONSTANT_FLOAT : FLOAT_CONST"""
-    operand_address = memory_assigner.assign('c_float', p[1])
-    operand_stack.push(operand_address)
-    operand_type_stack.push('float')
+    context = p.lexer.context
+    operand_address = context.memory_assigner.assign('c_float', p[1])
+    context.operand_stack.push(operand_address)
+    context.operand_type_stack.push('float')
 
 
 def p_constant_string(p):
     """CONSTANT_STRING : STRING_CONST"""
-    operand_address = memory_assigner.assign('c_string', p[1])
-    operand_stack.push(operand_address)
-    operand_type_stack.push('string')
+    context = p.lexer.context
+    operand_address = context.memory_assigner.assign('c_string', p[1])
+    context.operand_stack.push(operand_address)
+    context.operand_type_stack.push('string')
 
 def p_empty(p):
     """empty :"""
     pass
 
 def p_error(p):
-    print(f"Syntax error at line {p.lineno}, position {p.lexpos}, token {p.type}")
+    if p is None:
+        raise InvalidSyntaxError('Syntax error at the end of the input')
+    raise InvalidSyntaxError(f"Syntax error at line {p.lineno}, position {p.lexpos}, token {p.type}")
 
-# Build the parser
-parser = yacc.yacc(debug=True)
+# Build the parser from its cached tables, PARSER_DEBUG=1 writes tables/parser.out
+parser = build_parser(sys.modules[__name__], debug=os.environ.get('PARSER_DEBUG') == '1')
 
-def parse(data):
+def parse(data, passes=(), options=None, context=None, scanner=None):
     """
     Parse the input data.
     
     Parameters:
-    - data (str): The data to parse.
+    - data (str): The data to parse, or a file object or mmap when reading it with a scanner.
+    - passes (list): The names of the optimization passes to run over the quadruples.
+    - options (dict): The keyword arguments of every optimization pass by name.
+    - context (CompilationContext): The state to compile into, a fresh one by default. Pass one to inspect the symbol tables afterwards.
+    - scanner (Scanner): The streaming scanner to read the tokens with, a copy of the PLY lexer by default.
 
     Returns:
-    - str: The output of the parser.
+    - tuple: The memory descriptor, the constant table and the QuadrupleBuilder.
     """
-    
-    parser.parse(data)
-    constant_table, counter_table = memory_assigner.output()
-    return (counter_table, constant_table, quadruples.output())
-    
\ No newline at end of file
+    context = context or CompilationContext()
+
+    # A copy of the lexer per parse keeps its line count and context apart
+    program_lexer = scanner or lexer.clone()
+    program_lexer.lineno = 1
+    program_lexer.context = context
+    program_lexer.input(data)
+
+    parser.parse(lexer=program_lexer)
+    optimize(context.quadruples, context.function_directory, passes, context.memory_assigner, options)
+    constant_table, counter_table = context.memory_assigner.output()
+    return (counter_table, constant_table, context.quadruples)
@@ -0,0 +1,247 @@
+"""
+Streaming lexical analysis module for the compiler.
+
+This module contains a scanner that produces the same tokens as the PLY
+lexer in x_lexer (same types, values and line numbers) without needing the
+whole source as one string. It reads a file object, an mmap or a string in
+chunks and yields tokens as it goes, each with its line and column.
+
+All the token rules are alternatives of one regular expression and the
+scanner walks it over the source with a single re scanner object: the kind
+of every match comes from the name of the group that matched and its value
+is converted inline, so there is no Python callback per token. The scanner
+plugs into the parser like the PLY lexer does:
+
+    scanner = Scanner()
+    scanner.input(open('program.duck'))
+    parser.parse(lexer=scanner)
+"""
+
+import re
+import codecs
+import functools
+
+from x_lexer import reserved_keywords
+
+# Number of characters read from the source at a time
+CHUNK_SIZE = 1 << 16
+
+# Token types of the operators and delimiters
+SYMBOLS = {
+    '<': 'LESS_THAN',
+    '>': 'MORE_THAN',
+    '<=': 'LESS_THAN_EQUAL',
+    '>=': 'MORE_THAN_EQUAL',
+    '==': 'EQUAL',
+    '!=': 'NOT_EQUAL',
+    '=': 'ASSIGN',
+    '[': 'SQ_BRACKET_OPEN',
+    ']': 'SQ_BRACKET_CLOSE',
+    '(': 'BRACKET_OPEN',
+    ')': 'BRACKET_CLOSE',
+    '{': 'CURLY_BRACKET_OPEN',
+    '}': 'CURLY_BRACKET_CLOSE',
+    '*': 'MULTIPLY',
+    '/': 'DIVIDE',
+    '+': 'ADD',
+    '-': 'SUBTRACT',
+    ';': 'SEMICOLON',
+    ':': 'TWO_DOTS',
+    ',': 'COMMA',
+}
+
+# The rules of x_lexer in the order PLY tries them: function rules first,
+# then the simple rules, longest regular expression first. Ignored
+# characters are skipped in the same match as the token that follows them,
+# IGNORE only matches them when no token follows.
+MASTER_PATTERN = re.compile(r'''
+    [ \t]*
+    (?:
+        (?P<ID>[a-zA-Z_][a-zA-Z_0-9]*)
+      | (?P<FLOAT_CONST>[-+]?[0-9]+\.[0-9]+(?:[eE][-+]?[0-9]+)?)
+      | (?P<INT_CONST>[0-9]+)
+      | (?P<STRING_CONST>"[^"]*"|'[^']*')
+      | (?P<COMMENT>\#[^\n]*)
+      | (?P<NEWLINE>\n+)
+      | (?P<SYMBOL><=|>=|==|!=|[<>=\[\](){}*/+\-;:,])
+      | (?P<IGNORE>[ \t]+)
+    )
+''', re.VERBOSE)
+
+QUOTES = ('"', "'")
+
+
+class Token:
+    """
+    This class represents a token, it has the attributes of a PLY LexToken and its column.
+
+    Attributes:
+    - type (str): The token type.
+    - value: The token value (str, int or float).
+    - lineno (int): The line of the token, counted like the PLY lexer does.
+    - lexpos (int): The position of the token in the source, in characters.
+    - column (int): The column of the token in its line, starting at 1.
+    - lexer (Scanner): The scanner, set by the parser on syntax errors.
+    """
+
+    __slots__ = ('type', 'value', 'lineno', 'lexpos', 'column', 'lexer')
+
+    def __init__(self, type, value, lineno, lexpos, column):
+        self.type = type
+        self.value = value
+        self.lineno = lineno
+        self.lexpos = lexpos
+        self.column = column
+
+    def __str__(self):
+        return f'LexToken({self.type},{self.value!r},{self.lineno},{self.lexpos})'
+
+    def __repr__(self):
+        return str(self)
+
+
+class Scanner:
+    """
+    This class represents the streaming scanner.
+
+    Sources are scanned up to their last complete line, the rest waits for
+    the next chunk: no token other than a string spans lines, so a token is
+    never cut in two. A string that is still open at the end of the complete
+    lines waits for more chunks too.
+
+    Attributes:
+    - chunk_size (int): The number of characters read from the source at a time.
+    - lineno (int): The current line.
+    - lexpos (int): The position up to which the source has been scanned.
+    - tokens (generator): The tokens of the current source.
+    - context (CompilationContext): The compilation state, set by the parser.
+    """
+
+    def __init__(self, source=None, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.lineno = 1
+        self.lexpos = 0
+        self.tokens = iter(())
+        self.context = None
+
+        if source is not None:
+            self.input(source)
+
+    def input(self, source):
+        """
+        Start scanning a source.
+
+        Parameters:
+        - source: A string, bytes (UTF-8), or a file object or mmap whose read method returns either.
+        """
+        self.lineno = 1
+        self.lexpos = 0
+        self.tokens = self.generate(self.reader(source))
+        # The parser calls token once per token, skip the method call
+        self.token = functools.partial(next, self.tokens, None)
+
+    def reader(self, source):
+        """
+        Build a function that returns the next chunk of a source as a string, an empty one at the end.
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = bytes(source).decode('utf-8')
+        if isinstance(source, str):
+            chunks = iter((source,))
+            return lambda: next(chunks, '')
+
+        read, size = source.read, self.chunk_size
+        decoder = codecs.getincrementaldecoder('utf-8')()
+
+        def chunk():
+            data = read(size)
+            if isinstance(data, str):
+                return data
+            text = decoder.decode(data, final=not data)
+            # A chunk can end inside a character, an empty string would mean the end
+            while data and not text:
+                data = read(size)
+                text = decoder.decode(data, final=not data)
+            return text
+        return chunk
+
+    def token(self):
+        """
+        Get the next token.
+
+        Returns:
+        - Token: The next token, or None at the end of the source.
+        """
+        return next(self.tokens, None)
+
+    def __iter__(self):
+        return self.tokens
+
+    def generate(self, read):
+        """
+        Scan a source.
+
+        Parameters:
+        - read (callable): The function returning the next chunk of the source.
+
+        Returns:
+        - generator: The tokens.
+        """
+        reserved = reserved_keywords
+        symbols = SYMBOLS
+        buffer = ''
+        offset = 0
+        # Position of the newline before the current line, columns count from it
+        line_start = -1
+        lineno = 1
+        eof = False
+
+        while not eof or buffer:
+            if not eof:
+                chunk = read()
+                if chunk:
+                    buffer += chunk
+                else:
+                    eof = True
+
+            end = len(buffer) if eof else buffer.rfind('\n') + 1
+            if end == 0:
+                continue
+
+            position = 0
+            while position < end:
+                match = MASTER_PATTERN.scanner(buffer, position, end).match
+                for found in iter(match, None):
+                    kind = found.lastgroup
+                    text = found.group(kind)
+                    start = offset + found.start(kind)
+
+                    if kind == 'ID':
+                        yield Token(reserved.get(text, 'ID'), text, lineno, start, start - line_start)
+                    elif kind == 'SYMBOL':
+                        yield Token(symbols[text], text, lineno, start, start - line_start)
+                    elif kind == 'NEWLINE':
+                        lineno += len(text)
+                        line_start = offset + found.end() - 1
+                        self.lineno = lineno
+                    elif kind == 'INT_CONST':
+                        yield Token(kind, int(text), lineno, start, start - line_start)
+                    elif kind == 'FLOAT_CONST':
+                        yield Token(kind, float(text), lineno, start, start - line_start)
+                    elif kind == 'STRING_CONST':
+                        yield Token(kind, text[1:-1], lineno, start, start - line_start)
+                        # Like the PLY lexer, newlines inside strings don't count as lines
+                        if '\n' in text:
+                            line_start = start + text.rfind('\n')
+                    position = found.end()
+
+                if position < end:
+                    if buffer[position] in QUOTES and not eof:
+                        # The string may close in a later chunk
+                        break
+                    print(f'Illegal character {buffer[position]}')
+                    position += 1
+
+            buffer = buffer[position:]
+            offset += position
+            self.lexpos = offset